@@ -9,10 +9,140 @@ import time
 import numpy as np
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
+from itertools import islice
 from typing import Dict, List, Tuple, Optional
 import threading
+import queue
 import sqlite3
 import os
+import weakref
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit; kernels run as plain Python."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Rows the background writer commits per transaction
+DB_BATCH_SIZE = 1000
+# Seconds a read waits for the writer to commit rows queued before it
+FLUSH_TIMEOUT = 5.0
+# Rows fetched per chunk when streaming an export
+EXPORT_CHUNK_SIZE = 1000
+# Columns exported per table
+EXPORT_COLUMNS = {
+    'detections': ('timestamp', 'camera_id', 'track_id', 'confidence',
+                   'bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2', 'frame_number'),
+    'alerts': ('timestamp', 'alert_type', 'severity', 'camera_id', 'message'),
+}
+
+# Mean pairwise spacing (pixels) at which herd cohesion drops to 100/e (~37)
+COHESION_SCALE = 200.0
+# Path shape thresholds: share of variance along the main axis, and net turning (radians)
+LINEAR_VARIANCE_RATIO = 0.95
+CIRCULAR_MIN_TURN = np.pi
+
+@njit(cache=True, fastmath=True)
+def _movement_kernel(center_x, center_y, prev_x, prev_y, dt, prev_total):
+    """Return (speed, direction, total_distance) arrays for one step of each track's center"""
+    dx = center_x - prev_x
+    dy = center_y - prev_y
+    distance = np.sqrt(dx * dx + dy * dy)
+    speed = np.where(dt > 0, distance / np.where(dt > 0, dt, 1.0), 0.0)
+    return speed, np.arctan2(dy, dx), prev_total + distance
+
+@njit(cache=True)
+def _heatmap_kernel(heat, boxes, x_scale, y_scale):
+    """Add one hit per [x1, y1, x2, y2] box center to heat, clipping cells to the grid"""
+    rows, cols = heat.shape
+    for i in range(boxes.shape[0]):
+        grid_x = min(max(int((boxes[i, 0] + boxes[i, 2]) * 0.5 * x_scale), 0), cols - 1)
+        grid_y = min(max(int((boxes[i, 1] + boxes[i, 3]) * 0.5 * y_scale), 0), rows - 1)
+        heat[grid_y, grid_x] += 1
+
+@njit(cache=True, fastmath=True)
+def _mean_pairwise_distance(xs, ys):
+    """Mean Euclidean distance over all unordered pairs of points"""
+    n = xs.shape[0]
+    total = 0.0
+    for i in range(n):
+        for j in range(i + 1, n):
+            dx = xs[i] - xs[j]
+            dy = ys[i] - ys[j]
+            total += np.sqrt(dx * dx + dy * dy)
+    return total / (n * (n - 1) / 2) if n > 1 else 0.0
+
+@njit(cache=True, fastmath=True)
+def _path_shape(xs, ys):
+    """Return (variance share of the main axis, net turning in radians, path length) for a path"""
+    n = xs.shape[0]
+    mean_x = xs.mean()
+    mean_y = ys.mean()
+    sxx = 0.0
+    syy = 0.0
+    sxy = 0.0
+    for i in range(n):
+        dx = xs[i] - mean_x
+        dy = ys[i] - mean_y
+        sxx += dx * dx
+        syy += dy * dy
+        sxy += dx * dy
+    spread = sxx + syy
+    # Largest eigenvalue of the 2x2 covariance, in closed form
+    main_axis = 0.5 * spread + np.sqrt(0.25 * (sxx - syy) ** 2 + sxy * sxy)
+    linearity = main_axis / spread if spread > 0 else 1.0
+    
+    length = 0.0
+    turn = 0.0
+    prev_heading = 0.0
+    have_heading = False
+    for i in range(1, n):
+        dx = xs[i] - xs[i - 1]
+        dy = ys[i] - ys[i - 1]
+        step = np.sqrt(dx * dx + dy * dy)
+        if step == 0:
+            continue
+        length += step
+        heading = np.arctan2(dy, dx)
+        if have_heading:
+            delta = heading - prev_heading
+            # Wrap into (-pi, pi] so turning left and right cancel out
+            if delta > np.pi:
+                delta -= 2 * np.pi
+            elif delta <= -np.pi:
+                delta += 2 * np.pi
+            turn += delta
+        prev_heading = heading
+        have_heading = True
+    return linearity, turn, length
+
+@njit(cache=True)
+def _aggregate_and_points(heat, vis_grid_size, out_y, out_x, out_v):
+    """Block-sum heat into a vis_grid_size grid and write its nonzero cells to out_*; returns the count"""
+    rows, cols = heat.shape
+    scale_y = rows / vis_grid_size
+    scale_x = cols / vis_grid_size
+    aggregated = np.zeros((vis_grid_size, vis_grid_size), dtype=np.int64)
+    for y in range(rows):
+        agg_y = int(y / scale_y)
+        for x in range(cols):
+            aggregated[agg_y, int(x / scale_x)] += heat[y, x]
+            
+    n = 0
+    for agg_y in range(vis_grid_size):
+        for agg_x in range(vis_grid_size):
+            if aggregated[agg_y, agg_x] > 0:
+                out_y[n] = agg_y
+                out_x[n] = agg_x
+                out_v[n] = aggregated[agg_y, agg_x]
+                n += 1
+    return n
 
 class BisonAnalytics:
     """
@@ -22,23 +152,41 @@ class BisonAnalytics:
     def __init__(self, db_path: str = "bisonguard_analytics.db"):
         self.db_path = db_path
         self.lock = threading.Lock()
-        self.heatmap_resolution = (100, 100) # Higher internal resolution
+        self.heatmap_resolution = (100, 100) # Higher internal resolution (rows, cols)
+        self.heatmap_vis_grid_size = 20       # Display grid served by get_heatmap_data
+        # Reused output buffers (rows: y, x, value) for the heatmap aggregation kernel
+        self._heatmap_points = np.zeros((3, self.heatmap_vis_grid_size ** 2), dtype=np.int64)
+        # Frame pixels (assumed 1920x1080) to heatmap cells
+        self._hx_scale = np.float32(self.heatmap_resolution[1] / 1920.0)
+        self._hy_scale = np.float32(self.heatmap_resolution[0] / 1080.0)
         
         # Real-time data structures
-        self.current_detections = defaultdict(list)  # camera_id -> list of current detections
-        self.tracking_history = defaultdict(lambda: deque(maxlen=1000))  # track_id -> position history
-        self.movement_patterns = defaultdict(dict)  # track_id -> movement data
-        self.zone_heatmap = defaultdict(lambda: np.zeros(self.heatmap_resolution))
+        self.current_detections = defaultdict(list)  # camera_id -> current detections, as passed in
+        self.current_counts = defaultdict(int)  # camera_id -> number of current detections
+        self.tracking_history = {}  # track_id -> (x, y, monotonic time) history (deque), in first-seen order
+        self._mono_epoch = time.time() - time.monotonic()  # converts monotonic stamps to wall-clock time
+        
+        # Movement data as struct-of-arrays; tracks get a compact slot on their first measured movement
+        self._track_slot = {}      # track_id -> slot
+        self._slot_track_ids = []  # slot -> track_id
+        self._current_speed = np.zeros(1024)
+        self._avg_speed = np.zeros(1024)
+        self._total_distance = np.zeros(1024)
+        self._direction = np.zeros(1024)
+        self._speed_samples = np.zeros(1024, dtype=np.int64)
+        
+        self.zone_heatmap = defaultdict(lambda: np.zeros(self.heatmap_resolution, dtype=np.uint32))  # hit counts
         
         # Time-series data
         self.hourly_counts = deque(maxlen=24)  # Last 24 hours
         self.daily_counts = deque(maxlen=30)   # Last 30 days
         self.detection_confidence = deque(maxlen=1000)
+        self._confidence_sum = 0.0  # running sum of detection_confidence
         
         # Statistics
         self.stats = {
             'total_detections': 0,
-            'unique_tracks': set(),
+            'unique_tracks': 0,
             'peak_count': 0,
             'peak_time': None,
             'avg_confidence': 0.0,
@@ -47,6 +195,8 @@ class BisonAnalytics:
             'cameras_active': 0
         }
         
+        self._track_seen = bytearray(1 << 16)  # bitset of seen track ids, grown on demand
+        
         # Alert thresholds
         self.alert_thresholds = {
             'high_activity': 10,      # More than 10 bison
@@ -56,13 +206,34 @@ class BisonAnalytics:
             'zone_intrusion': None    # Special zones (can be configured)
         }
         
+        # Single shared connection in autocommit mode, guarded by self._db_lock;
+        # writes are batched in explicit transactions
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA temp_store=MEMORY')
+        self._conn.execute('PRAGMA wal_autocheckpoint=1000')
+        self._conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache
+        self._db_lock = threading.Lock()
+        
         # Initialize database
         self._init_database()
         
+        # Background writer: the detection path only enqueues (kind, rows) batches
+        self._write_q = queue.Queue(maxsize=10000)
+        self._dropped_rows = 0
+        self._writer_thread = threading.Thread(target=self._writer_loop,
+                                               args=(self._write_q, self._conn, self._db_lock), daemon=True)
+        self._writer_thread.start()
+        # The writer is a daemon thread, so flush what it still holds when the instance is
+        # collected or the process exits (neither the thread nor the finalizer references self)
+        self._closed = False
+        self._finalizer = weakref.finalize(self, self._shutdown, self._write_q, self._writer_thread,
+                                           self._conn, self._db_lock)
+        
     def _init_database(self):
         """Initialize SQLite database for historical data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
         
         # Detections table
         cursor.execute('''
@@ -120,8 +291,10 @@ class BisonAnalytics:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Indexes for time-window scans and the hourly rollup
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_det_ts ON detections(timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_det_ts_cam ON detections(camera_id, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_hourly_ts ON hourly_stats(hour_timestamp)')
         
         # Rebuild heatmap from historical data
         self._rebuild_heatmap_from_db()
@@ -129,8 +302,7 @@ class BisonAnalytics:
     def _rebuild_heatmap_from_db(self):
         """Rebuild heatmap from historical detection data"""
         print("Rebuilding heatmap from historical data...")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
         
         try:
             # Get recent detections (last 24 hours) to rebuild heatmap
@@ -138,28 +310,30 @@ class BisonAnalytics:
                 SELECT camera_id, bbox_x1, bbox_y1, bbox_x2, bbox_y2
                 FROM detections 
                 WHERE timestamp > datetime('now', '-24 hours')
+                AND camera_id IS NOT NULL
                 AND bbox_x1 IS NOT NULL AND bbox_y1 IS NOT NULL
                 AND bbox_x2 IS NOT NULL AND bbox_y2 IS NOT NULL
             ''')
             
             detections = cursor.fetchall()
-            heatmap_counts = defaultdict(int)
+            heatmap_counts = {}
             
-            for camera_id, x1, y1, x2, y2 in detections:
-                # Use the center of the bounding box for the heatmap
-                center_x = (x1 + x2) / 2
-                center_y = (y1 + y2) / 2
-
-                # Normalize coordinates to a higher resolution grid (e.g., 100x100)
+            if detections:
+                camera_ids = [row[0] for row in detections]
+                bboxes = np.array([row[1:] for row in detections], dtype=np.float32)
+                
+                # Normalize box centers to a higher resolution grid (e.g., 100x100)
                 # and then aggregate to the visualization grid size in get_heatmap_data
-                grid_x = int(center_x * (self.heatmap_resolution[0] / 1920))
-                grid_y = int(center_y * (self.heatmap_resolution[1] / 1080))
+                grid_y, grid_x = self._heatmap_cells((bboxes[:, :2] + bboxes[:, 2:]) * 0.5)
                 
-                grid_x = min(grid_x, self.heatmap_resolution[0] - 1)
-                grid_y = min(grid_y, self.heatmap_resolution[1] - 1)
-
-                self.zone_heatmap[camera_id][grid_y, grid_x] += 1
-                heatmap_counts[camera_id] += 1
+                # Accumulate each camera's (row, col) points as flat-index counts in one call
+                cells = grid_y * self.heatmap_resolution[1] + grid_x
+                cameras, camera_index = np.unique(np.asarray(camera_ids, dtype=object), return_inverse=True)
+                for i, camera_id in enumerate(cameras):
+                    mask = camera_index == i
+                    counts = np.bincount(cells[mask], minlength=self.heatmap_resolution[0] * self.heatmap_resolution[1])
+                    self.zone_heatmap[camera_id] += counts.reshape(self.heatmap_resolution).astype(np.uint32)
+                    heatmap_counts[camera_id] = int(np.count_nonzero(mask))
             
             print(f"✓ Rebuilt heatmap with {len(detections)} detections")
             for camera_id, count in heatmap_counts.items():
@@ -167,210 +341,346 @@ class BisonAnalytics:
                 
         except Exception as e:
             print(f"Error rebuilding heatmap: {e}")
-        finally:
-            conn.close()
         
-    def process_frame_detections(self, camera_id: str, detections: List[Dict], frame_number: int):
+    def process_frame_detections(self, camera_id: str, detections, frame_number: int):
         """
         Process detections from a single frame
         
         Args:
             camera_id: Camera identifier
-            detections: List of detection dictionaries with bbox, confidence, track_id
+            detections: Either a list of detection dictionaries with bbox, confidence, track_id,
+                or arrays {'boxes': (N, 4) xyxy, 'ids': (N,) with 0 for untracked, 'conf': (N,), 'cls': (N,)}
             frame_number: Current frame number
         """
+        # Phase 1: frame-local work, no shared state touched
+        timestamp = datetime.now()   # wall clock, only for the returned payload and peak_time
+        ts_mono = time.monotonic()   # used for movement math
+        
+        # Read every detection field once as arrays, then derive centers in one pass
+        if isinstance(detections, dict):
+            confidences = np.asarray(detections['conf'], dtype=np.float64)
+            count = len(confidences)
+            track_ids = np.asarray(detections['ids'], dtype=np.int64)
+            bboxes = np.asarray(detections['boxes'], dtype=np.float64).reshape(count, 4)
+        else:
+            count = len(detections)
+            track_ids = np.fromiter((d.get('track_id') or 0 for d in detections),
+                                    dtype=np.int64, count=count)
+            confidences = np.fromiter((d.get('confidence', 0) for d in detections),
+                                      dtype=np.float64, count=count)
+            bboxes = np.array([d.get('bbox', (0, 0, 0, 0))[:4] for d in detections],
+                              dtype=np.float64).reshape(count, 4)  # [x1, y1, x2, y2]
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) * 0.5
+        tracked = np.flatnonzero(track_ids)
+        tracked_ids = track_ids[tracked].tolist()
+        alerts = self._check_frame_alerts(camera_id, count, confidences)
+        
+        # Phase 2: brief critical section for the shared dicts and arrays
         with self.lock:
-            timestamp = datetime.now()
-            
             # Store current detections
             self.current_detections[camera_id] = detections
+            self.current_counts[camera_id] = count
             
             # Update statistics
-            self.stats['total_detections'] += len(detections)
-            self.stats['cameras_active'] = len([d for d in self.current_detections.values() if d])
+            self.stats['total_detections'] += count
+            self.stats['cameras_active'] = sum(1 for n in self.current_counts.values() if n)
             
-            # Process each detection
-            for detection in detections:
-                track_id = detection.get('track_id')
-                confidence = detection.get('confidence', 0)
-                bbox = detection.get('bbox', [0, 0, 0, 0])  # [x1, y1, x2, y2]
-                
-                # Update confidence tracking
-                self.detection_confidence.append(confidence)
-                
-                # Update unique tracks
-                if track_id:
-                    self.stats['unique_tracks'].add(track_id)
-                    
-                    # Track movement
-                    self._track_movement(track_id, bbox, timestamp)
-                    
-                    # Update zone heatmap
-                    self._update_heatmap(camera_id, bbox)
+            # Update confidence tracking
+            self._update_confidence_window(confidences)
+            
+            # Update unique tracks and movement for tracked detections
+            for track_id in tracked_ids:
+                self._mark_track_seen(track_id)
+            if tracked_ids:
+                self._track_movement(tracked_ids, centers[tracked], ts_mono)
                 
-                # Store in database
-                self._store_detection(camera_id, detection, frame_number)
+                # Update zone heatmap
+                self._update_heatmap(camera_id, bboxes[tracked])
                 
-            # Check for alerts
-            alerts = self._check_alerts(camera_id, detections)
+            # Check for alerts that depend on shared movement state
+            alerts += self._check_movement_alerts(camera_id)
+            self.stats['total_alerts'] += len(alerts)
             
             # Update peak count
-            current_count = len(detections)
-            if current_count > self.stats['peak_count']:
-                self.stats['peak_count'] = current_count
+            if count > self.stats['peak_count']:
+                self.stats['peak_count'] = count
                 self.stats['peak_time'] = timestamp
                 
             # Update average confidence
             if self.detection_confidence:
-                self.stats['avg_confidence'] = np.mean(list(self.detection_confidence))
+                self.stats['avg_confidence'] = self._confidence_sum / len(self.detection_confidence)
+                
+        # Phase 3: hand rows to the background writer outside the lock
+        self._store_detections(camera_id, track_ids, confidences, bboxes, frame_number)
+        for alert in alerts:
+            if alert['type'] == 'high_activity':
+                self._store_alert(alert)
                 
         return {
-            'count': len(detections),
+            'count': count,
             'alerts': alerts,
             'timestamp': timestamp.isoformat()
         }
         
-    def _track_movement(self, track_id: int, bbox: List[float], timestamp: datetime):
-        """Track movement patterns for individual bison"""
-        center_x = (bbox[0] + bbox[2]) / 2
-        center_y = (bbox[1] + bbox[3]) / 2
-        position = (center_x, center_y, timestamp)
-        
-        self.tracking_history[track_id].append(position)
-        
-        # Calculate movement metrics
-        if len(self.tracking_history[track_id]) > 1:
-            prev_pos = self.tracking_history[track_id][-2]
+    def _mark_track_seen(self, track_id: int):
+        """Set the track's bit in the seen-bitset, counting it the first time"""
+        byte, bit = track_id >> 3, 1 << (track_id & 7)
+        if byte >= len(self._track_seen):
+            self._track_seen.extend(bytes(max(len(self._track_seen), byte + 1 - len(self._track_seen))))
+        if not self._track_seen[byte] & bit:
+            self._track_seen[byte] |= bit
+            self.stats['unique_tracks'] += 1
             
-            # Calculate speed (pixels per second)
-            time_diff = (timestamp - prev_pos[2]).total_seconds()
-            if time_diff > 0:
-                distance = np.sqrt((center_x - prev_pos[0])**2 + (center_y - prev_pos[1])**2)
-                speed = distance / time_diff
-                
-                self.movement_patterns[track_id] = {
-                    'current_speed': speed,
-                    'avg_speed': np.mean([p.get('current_speed', 0) 
-                                         for p in [self.movement_patterns.get(track_id, {})]]),
-                    'total_distance': self.movement_patterns.get(track_id, {}).get('total_distance', 0) + distance,
-                    'direction': np.arctan2(center_y - prev_pos[1], center_x - prev_pos[0])
-                }
+    def _update_confidence_window(self, confidences: np.ndarray):
+        """Append a frame's confidences to the rolling window, keeping its running sum"""
+        window = self.detection_confidence
+        values = confidences.tolist()
+        evicted = len(window) + len(values) - window.maxlen
+        
+        if evicted >= len(window):
+            # The whole window is replaced; recompute from what remains
+            window.extend(values)
+            self._confidence_sum = sum(window)
+            return
+            
+        if evicted > 0:
+            self._confidence_sum -= sum(islice(window, evicted))
+        window.extend(values)
+        self._confidence_sum += sum(values)
+        
+    def _track_movement(self, track_ids: List, centers: np.ndarray, ts_mono: float):
+        """Track movement patterns for a frame's tracked bison, one kernel call per frame"""
+        count = len(track_ids)
+        prev = np.zeros((count, 3))  # prev x, prev y, dt
+        prev_total = np.zeros(count)
+        slots = np.full(count, -1, dtype=np.int64)
+        moved = np.zeros(count, dtype=np.bool_)
+        
+        # History lookups and appends stay in Python; all arithmetic is left to the kernel
+        for i, (track_id, (center_x, center_y)) in enumerate(zip(track_ids, centers.tolist())):
+            history = self.tracking_history.get(track_id)
+            if history is None:
+                history = self.tracking_history[track_id] = deque(maxlen=1000)
+            if history:
+                prev_x, prev_y, prev_time = history[-1]
+                time_diff = ts_mono - prev_time
+                prev[i] = prev_x, prev_y, time_diff
+                if time_diff > 0:
+                    slot = self._track_slot.get(track_id)
+                    if slot is None:
+                        slot = self._assign_track_slot(track_id)
+                    else:
+                        prev_total[i] = self._total_distance[slot]
+                    slots[i] = slot
+                    moved[i] = True
+            history.append((center_x, center_y, ts_mono))
+            
+        if not moved.any():
+            return
+            
+        # Calculate movement metrics (speed in pixels per second)
+        speed, direction, total_distance = _movement_kernel(
+            centers[:, 0], centers[:, 1], prev[:, 0], prev[:, 1], prev[:, 2], prev_total
+        )
+        slots = slots[moved]
+        speed = speed[moved]
+        self._speed_samples[slots] += 1
+        self._current_speed[slots] = speed
+        self._avg_speed[slots] += (speed - self._avg_speed[slots]) / self._speed_samples[slots]  # running mean
+        self._total_distance[slots] = total_distance[moved]
+        self._direction[slots] = direction[moved]
                 
-    def _update_heatmap(self, camera_id: str, bbox: List[float]):
+    def _assign_track_slot(self, track_id: int) -> int:
+        """Give a track the next movement slot, doubling the arrays when full"""
+        slot = len(self._slot_track_ids)
+        if slot == self._current_speed.size:
+            (self._current_speed, self._avg_speed, self._total_distance,
+             self._direction, self._speed_samples) = (
+                np.concatenate([a, np.zeros_like(a)])
+                for a in (self._current_speed, self._avg_speed, self._total_distance,
+                          self._direction, self._speed_samples)
+            )
+        self._track_slot[track_id] = slot
+        self._slot_track_ids.append(track_id)
+        return slot
+        
+    def _heatmap_cells(self, centers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Map an (N, 2) array of box centers to heatmap (row, col) indices"""
+        rows, cols = self.heatmap_resolution
+        grid_x = np.clip((centers[:, 0] * self._hx_scale).astype(np.int32), 0, cols - 1)
+        grid_y = np.clip((centers[:, 1] * self._hy_scale).astype(np.int32), 0, rows - 1)
+        return grid_y, grid_x
+        
+    def _update_heatmap(self, camera_id: str, bboxes: np.ndarray):
         """Update zone heatmap for activity visualization"""
-        # Normalize bbox coordinates to 10x10 grid
-        grid_x = min(int(bbox[0] / 192), 9)  # Assuming 1920px width
-        grid_y = min(int(bbox[1] / 108), 9)  # Assuming 1080px height
-        
-        self.zone_heatmap[camera_id][grid_y, grid_x] += 1
+        _heatmap_kernel(self.zone_heatmap[camera_id], bboxes, float(self._hx_scale), float(self._hy_scale))
         
-    def _check_alerts(self, camera_id: str, detections: List[Dict]) -> List[Dict]:
-        """Check for alert conditions"""
+    def _check_frame_alerts(self, camera_id: str, count: int, confidences: np.ndarray) -> List[Dict]:
+        """Check alert conditions that depend only on the current frame"""
         alerts = []
         
         # High activity alert
-        if len(detections) > self.alert_thresholds['high_activity']:
-            alert = {
+        if count > self.alert_thresholds['high_activity']:
+            alerts.append({
                 'type': 'high_activity',
                 'severity': 'warning',
                 'camera_id': camera_id,
-                'message': f'High bison activity: {len(detections)} detected',
-                'count': len(detections)
-            }
-            alerts.append(alert)
-            self._store_alert(alert)
+                'message': f'High bison activity: {count} detected',
+                'count': count
+            })
             
         # Low confidence alert
-        if detections:
-            avg_conf = np.mean([d.get('confidence', 0) for d in detections])
+        if count:
+            avg_conf = float(confidences.sum()) / count
             if avg_conf < self.alert_thresholds['low_confidence']:
-                alert = {
+                alerts.append({
                     'type': 'low_confidence',
                     'severity': 'info',
                     'camera_id': camera_id,
                     'message': f'Low detection confidence: {avg_conf:.2f}',
                     'confidence': avg_conf
-                }
-                alerts.append(alert)
-                
-        # Rapid movement detection
-        for track_id, movement in self.movement_patterns.items():
-            if movement.get('current_speed', 0) > self.alert_thresholds['rapid_movement']:
-                alert = {
-                    'type': 'rapid_movement',
-                    'severity': 'warning',
-                    'camera_id': camera_id,
-                    'message': f'Rapid movement detected for track {track_id}',
-                    'track_id': track_id,
-                    'speed': movement['current_speed']
-                }
-                alerts.append(alert)
+                })
                 
-        self.stats['total_alerts'] += len(alerts)
         return alerts
         
-    def _store_detection(self, camera_id: str, detection: Dict, frame_number: int):
-        """Store detection in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _check_movement_alerts(self, camera_id: str) -> List[Dict]:
+        """Check tracked movement for alert conditions; call with self.lock held"""
+        alerts = []
         
-        cursor.execute('''
-            INSERT INTO detections (camera_id, track_id, confidence, 
-                                  bbox_x1, bbox_y1, bbox_x2, bbox_y2, frame_number)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            camera_id,
-            detection.get('track_id'),
-            detection.get('confidence'),
-            detection.get('bbox', [0,0,0,0])[0],
-            detection.get('bbox', [0,0,0,0])[1],
-            detection.get('bbox', [0,0,0,0])[2],
-            detection.get('bbox', [0,0,0,0])[3],
-            frame_number
-        ))
-        
-        conn.commit()
-        conn.close()
+        # Rapid movement detection: one comparison over all tracks, then look up only the flagged ones
+        speeds = self._current_speed[:len(self._slot_track_ids)]
+        for slot in np.flatnonzero(speeds > self.alert_thresholds['rapid_movement']).tolist():
+            track_id = self._slot_track_ids[slot]
+            alerts.append({
+                'type': 'rapid_movement',
+                'severity': 'warning',
+                'camera_id': camera_id,
+                'message': f'Rapid movement detected for track {track_id}',
+                'track_id': track_id,
+                'speed': float(speeds[slot])
+            })
+            
+        return alerts
         
-    def _store_alert(self, alert: Dict):
-        """Store alert in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _store_detections(self, camera_id: str, track_ids: np.ndarray, confidences: np.ndarray,
+                          bboxes: np.ndarray, frame_number: int):
+        """Queue a frame's detections for the background writer; untracked ids (0) are stored as NULL"""
+        if len(track_ids):
+            self._enqueue_rows('detections', [
+                (camera_id, track_id or None, confidence, *bbox, frame_number)
+                for track_id, confidence, bbox in zip(track_ids.tolist(), confidences.tolist(), bboxes.tolist())
+            ])
         
-        cursor.execute('''
-            INSERT INTO alerts (alert_type, severity, camera_id, message, data)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
+    def _store_alert(self, alert: Dict):
+        """Queue alert for the background writer"""
+        self._enqueue_rows('alerts', [(
             alert['type'],
             alert['severity'],
             alert['camera_id'],
             alert['message'],
             json.dumps(alert)
-        ))
+        )])
         
-        conn.commit()
-        conn.close()
+    def _enqueue_rows(self, kind: str, rows: List[Tuple]):
+        """Hand rows to the writer without blocking; drop them if it has fallen too far behind"""
+        if self._closed:
+            return
+        try:
+            self._write_q.put_nowait((kind, rows))
+        except queue.Full:
+            if not self._dropped_rows:
+                print("Warning: analytics database writer is behind, dropping rows")
+            self._dropped_rows += len(rows)
+            
+    @staticmethod
+    def _writer_loop(write_q: queue.Queue, conn: sqlite3.Connection, db_lock: threading.Lock):
+        """Drain queued rows and commit up to DB_BATCH_SIZE of them per transaction"""
+        running = True
+        while running:
+            batch = [write_q.get()]
+            row_count = len(batch[0][1]) if batch[0] and batch[0][0] != 'flush' else 0
+            while batch[-1] is not None and row_count < DB_BATCH_SIZE:
+                try:
+                    item = write_q.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                row_count += len(item[1]) if item and item[0] != 'flush' else 0
+                
+            if batch[-1] is None:  # close() sentinel
+                running = False
+                
+            detection_rows = [row for item in batch if item and item[0] == 'detections' for row in item[1]]
+            alert_rows = [row for item in batch if item and item[0] == 'alerts' for row in item[1]]
+            try:
+                BisonAnalytics._write_rows(conn, db_lock, detection_rows, alert_rows)
+            except Exception as e:
+                print(f"Analytics DB writer error: {e}")
+            finally:
+                for item in batch:
+                    if item and item[0] == 'flush':
+                        item[1].set()  # Everything queued before the marker is committed
+                    write_q.task_done()
+                    
+    def _flush_writes(self, timeout: float = FLUSH_TIMEOUT):
+        """
+        Wait until rows queued so far are committed, or `timeout` seconds pass.
+        Only waits for a marker queued now, not for the queue to drain, so rows
+        that keep arriving from the cameras can't hold a reader up indefinitely.
+        """
+        if self._closed:
+            raise RuntimeError("BisonAnalytics is closed")
+        done = threading.Event()
+        try:
+            self._write_q.put(('flush', done), timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+                    
+    @staticmethod
+    def _write_rows(conn: sqlite3.Connection, db_lock: threading.Lock,
+                    detection_rows: List[Tuple], alert_rows: List[Tuple]):
+        """Write detection and alert rows in a single transaction"""
+        if not detection_rows and not alert_rows:
+            return
+            
+        with db_lock:
+            conn.execute('BEGIN IMMEDIATE')  # take the write lock once per batch
+            try:
+                conn.executemany('''
+                    INSERT INTO detections (camera_id, track_id, confidence, 
+                                          bbox_x1, bbox_y1, bbox_x2, bbox_y2, frame_number)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', detection_rows)
+                conn.executemany('''
+                    INSERT INTO alerts (alert_type, severity, camera_id, message, data)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', alert_rows)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
         
     def get_statistics(self) -> Dict:
         """Get comprehensive statistics"""
         with self.lock:
             # Calculate additional metrics
-            total_current = sum(len(d) for d in self.current_detections.values())
+            total_current = sum(self.current_counts.values())
             
             # Movement statistics
             movement_stats = {}
-            if self.movement_patterns:
-                speeds = [m.get('current_speed', 0) for m in self.movement_patterns.values()]
+            if self._slot_track_ids:
+                speeds = self._current_speed[:len(self._slot_track_ids)]
                 movement_stats = {
-                    'avg_speed': np.mean(speeds) if speeds else 0,
-                    'max_speed': max(speeds) if speeds else 0,
-                    'moving_tracks': len([s for s in speeds if s > 5])  # Threshold for "moving"
+                    'avg_speed': float(speeds.mean()),
+                    'max_speed': float(speeds.max()),
+                    'moving_tracks': int(np.count_nonzero(speeds > 5))  # Threshold for "moving"
                 }
                 
             return {
                 'total_detections': self.stats['total_detections'],
                 'current_count': total_current,
-                'unique_tracks': len(self.stats['unique_tracks']),
+                'unique_tracks': self.stats['unique_tracks'],
                 'peak_count': self.stats['peak_count'],
                 'peak_time': self.stats['peak_time'].isoformat() if self.stats['peak_time'] else None,
                 'avg_confidence': self.stats['avg_confidence'],
@@ -382,36 +692,50 @@ class BisonAnalytics:
             
     def get_historical_data(self, hours: int = 24) -> Dict:
         """Get historical data from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         since = datetime.now() - timedelta(hours=hours)
         
-        # Get hourly counts
-        cursor.execute('''
-            SELECT strftime('%Y-%m-%d %H:00:00', timestamp) as hour,
-                   COUNT(*) as count,
-                   COUNT(DISTINCT track_id) as unique_tracks,
-                   AVG(confidence) as avg_confidence
-            FROM detections
-            WHERE timestamp > ?
-            GROUP BY hour
-            ORDER BY hour
-        ''', (since,))
-        
-        hourly_data = cursor.fetchall()
-        
-        # Get recent alerts
-        cursor.execute('''
-            SELECT * FROM alerts
-            WHERE timestamp > ?
-            ORDER BY timestamp DESC
-            LIMIT 50
-        ''', (since,))
-        
-        alerts = cursor.fetchall()
+        # Wait for queued writes so the results include them
+        self._flush_writes()
         
-        conn.close()
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            
+            # Get hourly counts: completed hours come from the hourly_stats rollup,
+            # anything after the last rolled-up hour is aggregated from raw detections
+            cursor.execute('''
+                SELECT hour,
+                       SUM(total) as count,
+                       SUM(unique_tracks) as unique_tracks,
+                       SUM(avg_confidence * total) / SUM(total) as avg_confidence
+                FROM (
+                    SELECT hour_timestamp as hour, total_detections as total,
+                           unique_tracks, avg_confidence
+                    FROM hourly_stats
+                    WHERE datetime(hour_timestamp, '+1 hour') > ?
+                    UNION ALL
+                    SELECT strftime('%Y-%m-%d %H:00:00', timestamp) as hour, COUNT(*),
+                           COUNT(DISTINCT track_id), AVG(confidence)
+                    FROM detections
+                    WHERE timestamp > ?
+                    AND timestamp >= (SELECT COALESCE(datetime(MAX(hour_timestamp), '+1 hour'), '')
+                                      FROM hourly_stats)
+                    GROUP BY hour, camera_id
+                )
+                GROUP BY hour
+                ORDER BY hour
+            ''', (since, since))
+            
+            hourly_data = cursor.fetchall()
+            
+            # Get recent alerts
+            cursor.execute('''
+                SELECT * FROM alerts
+                WHERE timestamp > ?
+                ORDER BY timestamp DESC
+                LIMIT 50
+            ''', (since,))
+            
+            alerts = cursor.fetchall()
         
         return {
             'hourly': [{'hour': h[0], 'count': h[1], 'unique': h[2], 'confidence': h[3]} 
@@ -420,60 +744,154 @@ class BisonAnalytics:
                       for a in alerts]
         }
         
+    def rollup_completed_hours(self, hours: int = 24):
+        """Materialize hourly_stats for completed hours that have not been rolled up yet"""
+        self._flush_writes()
+        
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            cursor.execute('''
+                SELECT DISTINCT strftime('%Y-%m-%d %H:00:00', timestamp) as hour
+                FROM detections
+                WHERE timestamp >= COALESCE((SELECT datetime(MAX(hour_timestamp), '+1 hour') FROM hourly_stats),
+                                            datetime('now', ?))
+                AND timestamp < strftime('%Y-%m-%d %H:00:00', 'now')
+                ORDER BY hour
+            ''', (f'-{int(hours)} hours',))
+            
+            pending_hours = [row[0] for row in cursor.fetchall()]
+            for hour in pending_hours:
+                self._rollup_hour(hour)
+                
+        return len(pending_hours)
+        
+    def _rollup_hour(self, hour_ts: str):
+        """Aggregate one hour of detections per camera into hourly_stats"""
+        self._conn.execute('BEGIN IMMEDIATE')  # take the write lock once per batch
+        try:
+            self._conn.execute('DELETE FROM hourly_stats WHERE hour_timestamp = ?', (hour_ts,))
+            self._conn.execute('''
+                INSERT INTO hourly_stats (hour_timestamp, camera_id, total_detections,
+                                          unique_tracks, avg_confidence, max_simultaneous)
+                SELECT ?, camera_id, COUNT(*), COUNT(DISTINCT track_id), AVG(confidence), MAX(frame_count)
+                FROM (
+                    SELECT camera_id, track_id, confidence,
+                           COUNT(*) OVER (PARTITION BY camera_id, frame_number) as frame_count
+                    FROM detections
+                    WHERE timestamp >= ? AND timestamp < datetime(?, '+1 hour')
+                )
+                GROUP BY camera_id
+            ''', (hour_ts, hour_ts, hour_ts))
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+            
     def get_heatmap_data(self, camera_id: str) -> Dict:
         """Get heatmap data for visualization, aggregated for display."""
         with self.lock:
             if camera_id not in self.zone_heatmap:
                 return {'max': 0, 'data': []}
 
-            high_res_heatmap = self.zone_heatmap[camera_id]
-            
             # Aggregate the high-resolution heatmap to a smaller size for visualization
-            vis_grid_size = 20 
-            aggregated_heatmap = np.zeros((vis_grid_size, vis_grid_size))
-            
-            scale_y = self.heatmap_resolution[0] / vis_grid_size
-            scale_x = self.heatmap_resolution[1] / vis_grid_size
+            vis_grid_size = self.heatmap_vis_grid_size
+            ys, xs, values = self._aggregate_heatmap(self.zone_heatmap[camera_id])
 
-            for y in range(self.heatmap_resolution[0]):
-                for x in range(self.heatmap_resolution[1]):
-                    if high_res_heatmap[y, x] > 0:
-                        agg_y = int(y / scale_y)
-                        agg_x = int(x / scale_x)
-                        aggregated_heatmap[agg_y, agg_x] += high_res_heatmap[y, x]
-
-            if aggregated_heatmap.max() == 0:
+            if not values:
                 return {'max': 0, 'data': []}
 
             # Create data points for heatmap.js
-            points = []
-            for y in range(vis_grid_size):
-                for x in range(vis_grid_size):
-                    if aggregated_heatmap[y, x] > 0:
-                        points.append({
-                            'x': int(x * (800 / vis_grid_size)), # Scale to canvas size
-                            'y': int(y * (450 / vis_grid_size)), # Scale to canvas size
-                            'value': int(aggregated_heatmap[y, x])
-                        })
+            points = [
+                {
+                    'x': int(x * (800 / vis_grid_size)), # Scale to canvas size
+                    'y': int(y * (450 / vis_grid_size)), # Scale to canvas size
+                    'value': value
+                }
+                for y, x, value in zip(ys, xs, values)
+            ]
             
             return {
-                'max': int(np.max(aggregated_heatmap)),
+                'max': max(values),
                 'data': points
             }
             
+    def _aggregate_heatmap(self, high_res_heatmap: np.ndarray) -> Tuple[List[int], List[int], List[int]]:
+        """Return (rows, cols, values) of the nonzero cells of the heatmap aggregated to the display grid"""
+        vis_grid_size = self.heatmap_vis_grid_size
+        
+        if NUMBA_AVAILABLE:
+            out_y, out_x, out_v = self._heatmap_points
+            n = _aggregate_and_points(high_res_heatmap, vis_grid_size, out_y, out_x, out_v)
+            return out_y[:n].tolist(), out_x[:n].tolist(), out_v[:n].tolist()
+            
+        scale_y = self.heatmap_resolution[0] / vis_grid_size
+        scale_x = self.heatmap_resolution[1] / vis_grid_size
+        
+        # Block-sum: cell (y, x) belongs to bin int(y / scale), so each bin starts at ceil(i * scale)
+        row_starts = np.ceil(np.arange(vis_grid_size) * scale_y).astype(np.intp)
+        col_starts = np.ceil(np.arange(vis_grid_size) * scale_x).astype(np.intp)
+        aggregated_heatmap = np.add.reduceat(
+            np.add.reduceat(high_res_heatmap, row_starts, axis=0), col_starts, axis=1
+        )
+        ys, xs = np.nonzero(aggregated_heatmap)
+        return ys.tolist(), xs.tolist(), aggregated_heatmap[ys, xs].tolist()
+        
     def get_tracking_paths(self, limit: int = 10) -> Dict:
         """Get recent tracking paths for visualization"""
         with self.lock:
             paths = {}
-            for track_id in list(self.tracking_history.keys())[-limit:]:
+            # Walk back from the newest track so only `limit` keys are touched
+            recent_ids = list(islice(reversed(self.tracking_history), max(limit, 0)))
+            for track_id in reversed(recent_ids):
                 positions = self.tracking_history[track_id]
                 if positions:
+                    # Monotonic stamps become ISO strings only for the tracks returned here
                     paths[track_id] = [
-                        {'x': p[0], 'y': p[1], 'time': p[2].isoformat()}
+                        {'x': p[0], 'y': p[1],
+                         'time': datetime.fromtimestamp(self._mono_epoch + p[2]).isoformat()}
                         for p in positions
                     ]
             return paths
             
+    @staticmethod
+    def _position_arrays(positions) -> Tuple[np.ndarray, np.ndarray]:
+        """x and y float64 arrays from an (N, 2) array or a list of {'x', 'y'} dicts"""
+        if isinstance(positions, np.ndarray):
+            points = positions.reshape(-1, 2).astype(np.float64)
+            return np.ascontiguousarray(points[:, 0]), np.ascontiguousarray(points[:, 1])
+        xs = np.fromiter((p['x'] for p in positions), dtype=np.float64, count=len(positions))
+        ys = np.fromiter((p['y'] for p in positions), dtype=np.float64, count=len(positions))
+        return xs, ys
+        
+    def calculate_herd_cohesion(self, positions) -> float:
+        """Score from 0 to 100 for how tightly grouped the herd is (100 = all in one spot)"""
+        xs, ys = self._position_arrays(positions)
+        if len(xs) < 2:
+            return 100.0
+        return float(100.0 * np.exp(-_mean_pairwise_distance(xs, ys) / COHESION_SCALE))
+        
+    def detect_movement_pattern(self, path) -> Dict:
+        """Classify a path of positions as 'linear', 'circular', 'wandering' or 'stationary'"""
+        xs, ys = self._position_arrays(path)
+        if len(xs) < 3:
+            return {'type': 'stationary', 'linearity': 1.0, 'net_turn_degrees': 0.0, 'distance': 0.0}
+            
+        linearity, turn, length = _path_shape(xs, ys)
+        if length == 0:
+            pattern = 'stationary'
+        elif linearity >= LINEAR_VARIANCE_RATIO:
+            pattern = 'linear'
+        elif abs(turn) >= CIRCULAR_MIN_TURN:
+            pattern = 'circular'
+        else:
+            pattern = 'wandering'
+        return {
+            'type': pattern,
+            'linearity': float(linearity),
+            'net_turn_degrees': float(np.degrees(turn)),
+            'distance': float(length)
+        }
+        
     def generate_report(self) -> Dict:
         """Generate comprehensive analytics report"""
         stats = self.get_statistics()
@@ -492,3 +910,68 @@ class BisonAnalytics:
             'trend': trend,
             'generated_at': datetime.now().isoformat()
         }
+        
+    def export_rows(self, data_type: str = 'detections', start_date: Optional[str] = None,
+                    end_date: Optional[str] = None):
+        """
+        Return a generator over `data_type` rows between two YYYY-MM-DD dates (inclusive):
+        the column names first, then lists of up to EXPORT_CHUNK_SIZE rows, read lazily
+        from a cursor so memory stays flat however large the range is.
+        """
+        columns = EXPORT_COLUMNS.get(data_type)
+        if columns is None:
+            raise ValueError(f"Unknown export type: {data_type}")
+        for value in (start_date, end_date):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise ValueError(f"Invalid date (expected YYYY-MM-DD): {value}") from None
+        query = f'''
+            SELECT {', '.join(columns)} FROM {data_type}
+            WHERE timestamp >= ? AND timestamp < date(?, '+1 day')
+            ORDER BY id
+        '''
+        params = (start_date or '0000-01-01', end_date or '9999-12-30')
+        
+        # Wait for queued writes so the export includes them
+        self._flush_writes()
+        
+        def generate():
+            yield columns
+            if self.db_path == ':memory:':
+                # Only the shared connection can see an in-memory database (tests); read it all
+                # under the lock so a slow consumer can't keep the writer blocked
+                with self._db_lock:
+                    rows = self._conn.execute(query, params).fetchall()
+                for i in range(0, len(rows), EXPORT_CHUNK_SIZE):
+                    yield rows[i:i + EXPORT_CHUNK_SIZE]
+                return
+            # A separate read-only connection: under WAL it doesn't hold up the writer
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+            try:
+                cursor = conn.execute(query, params)
+                while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                    yield rows
+            finally:
+                conn.close()
+                
+        return generate()
+        
+    def close(self):
+        """Flush queued writes, stop the writer and close the database connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self._finalizer()
+        self._conn = None
+        
+    @staticmethod
+    def _shutdown(write_q: queue.Queue, writer_thread: threading.Thread,
+                  conn: sqlite3.Connection, db_lock: threading.Lock):
+        """Stop the writer once it has committed everything queued, then close the connection"""
+        write_q.put(None)
+        if writer_thread is not threading.current_thread():
+            writer_thread.join()
+        with db_lock:
+            conn.close()
@@ -6,16 +6,194 @@ Demonstrates all major features of the system
 
 import os
 import sys
-import time
-import json
+import signal
 import random
 import threading
-import webbrowser
-from datetime import datetime, timedelta
-from colorama import init, Fore, Back, Style
+from colorama import init, Fore, Style
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _enable_vt_mode():
+    """Return True if stdout is a terminal that renders ANSI escapes natively"""
+    if not sys.stdout.isatty():
+        return False
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING (Windows 10+)
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+
+# Initialize colorama for Windows color support. Terminals with native ANSI
+# support skip its stream wrapper, which otherwise parses every write; the
+# demo emits its own resets, so autoreset is not needed there.
+VT_MODE = _enable_vt_mode()
+if VT_MODE:
+    init(autoreset=False, convert=False, strip=False, wrap=False)
+else:
+    init(autoreset=True)
+
+# Seconds per pacing tick; pauses below are written for the default tick and
+# scale with BISONGUARD_DEMO_TICK (set it to 0 to run the demo without pauses)
+DEFAULT_TICK = 0.5
+
+# Heatmap cell tokens, weighted like the original choice list (no activity twice as likely)
+PALETTE = ['.', '.', Fore.GREEN + 'o' + Fore.RESET, Fore.YELLOW + 'O' + Fore.RESET, Fore.RED + '@' + Fore.RESET]
+if NUMPY_AVAILABLE:
+    _PALETTE_ARRAY = np.array(PALETTE, dtype=object)
+    _rng = np.random.default_rng()
+
+# Static demo content, built once at import
+DEMO_BEHAVIORS = ('grazing', 'moving', 'resting', 'alert')
+DEMO_CAMERAS = ('North Pasture', 'South Field', 'Water Hole', 'Forest Edge')
+
+DETECTION_STATS = (
+    ('Total Frames', 300),
+    ('Total Detections', 3567),
+    ('Average Count', 11.9),
+    ('Max Count', 18),
+    ('Processing Time', '10.2s'),
+    ('Average FPS', 29.4)
+)
+
+BEHAVIOR_DISTRIBUTION = (
+    ('Grazing', 65),
+    ('Moving', 20),
+    ('Resting', 10),
+    ('Alert', 3),
+    ('Unknown', 2)
+)
+
+BEHAVIOR_INSIGHTS = (
+    "• Herd is primarily in grazing mode (normal for afternoon)",
+    "• Low alert percentage indicates calm environment",
+    "• Movement pattern suggests migration to water source",
+    "• No unusual behavior detected"
+)
+
+MOVEMENT_PATTERNS = (
+    ("Linear Movement", "North → South", "2.3 km/h"),
+    ("Circular Pattern", "Around water hole", "0.8 km/h"),
+    ("Dispersed Grazing", "North Pasture", "0.3 km/h"),
+    ("Convergence", "Towards shelter", "3.5 km/h")
+)
+
+SAMPLE_ALERTS = (
+    ("LOW", "Bison entering restricted area", "14:23:15"),
+    ("MEDIUM", "Unusual clustering detected", "14:25:42"),
+    ("HIGH", "Rapid movement detected - possible predator", "14:28:03"),
+    ("INFO", "New bison entered monitoring zone", "14:30:21")
+)
+
+# (method, endpoint, status, description, succeeded)
+API_ENDPOINTS = tuple(
+    (method, endpoint, status, description, "200" in status or "Connected" in status)
+    for method, endpoint, status, description in (
+        ("GET", "/api/detections", "200 OK", "Current detections retrieved"),
+        ("GET", "/api/analytics/behavior", "200 OK", "Behavior data fetched"),
+        ("GET", "/api/analytics/movement", "200 OK", "Movement patterns analyzed"),
+        ("POST", "/api/alerts/acknowledge/1", "200 OK", "Alert acknowledged"),
+        ("GET", "/api/cameras", "200 OK", "Camera list retrieved"),
+        ("WebSocket", "/socket.io", "Connected", "Real-time stream established")
+    )
+)
+
+PERFORMANCE_TESTS = (
+    ("Video Processing", "1080p @ 30fps", "28.5 FPS", "✓"),
+    ("Detection Accuracy", "Test Dataset", "94.7%", "✓"),
+    ("Tracking Consistency", "30 min video", "98.2%", "✓"),
+    ("API Response Time", "100 requests", "45ms avg", "✓"),
+    ("Memory Usage", "4 cameras", "1.8GB", "✓"),
+    ("CPU Usage", "Full load", "68%", "✓"),
+    ("WebSocket Latency", "1000 events", "12ms", "✓")
+)
+
+DASHBOARD_FEATURES = (
+    "• Real-time video feeds",
+    "• Live detection statistics",
+    "• Interactive analytics charts",
+    "• Behavior classification",
+    "• Movement heatmaps",
+    "• Alert management",
+    "• Data export tools"
+)
+
+
+# Percentage -> distribution bar (one block per 5%), padded to 15 columns
+BAR_CACHE = {p: ('█' * (p // 5)).ljust(15) for p in range(101)}
+
+# Live detection status line; the color codes are baked in once
+LIVE_STATUS_FMT = ("\r" + Fore.GREEN + "Frame {0:4d} | " +
+                   Fore.YELLOW + "Bison: {1:2d} | " +
+                   Fore.CYAN + "FPS: {2:.1f} | " +
+                   Fore.MAGENTA + "Conf: {3:.2%}")
+# Same line as raw bytes, written straight to the fd on ANSI-capable terminals
+LIVE_STATUS_BYTES = ("\r" + Fore.GREEN + "Frame %4d | " +
+                     Fore.YELLOW + "Bison: %2d | " +
+                     Fore.CYAN + "FPS: %.1f | " +
+                     Fore.MAGENTA + "Conf: %.2f%%" + Style.RESET_ALL).encode()
+
+# Alert severity -> (color, symbol)
+SEVERITY_STYLE = {
+    "HIGH": (Fore.RED + Style.BRIGHT, "⚠️"),
+    "MEDIUM": (Fore.YELLOW, "⚡"),
+    "LOW": (Fore.CYAN, "ℹ️"),
+    "INFO": (Fore.GREEN, "✓")
+}
+
+
+def _format_lines(*lines):
+    """Join lines the way BisonGuardDemo._emit() would queue them one by one"""
+    return "".join(line + (Style.RESET_ALL if "\x1b" in line else "") + "\n" for line in lines)
+
+
+# Closing summary screens, formatted once at import
+PERF_SUMMARY = _format_lines(
+    Fore.CYAN + "\n📈 Performance Summary:",
+    "-" * 50,
+    Fore.WHITE + """
+        System Capabilities:
+        • Process 6 camera feeds simultaneously
+        • Maintain 25+ FPS with GPU acceleration
+        • Track up to 50 bison per frame
+        • Store 30 days of historical data
+        • Support 100+ concurrent web clients
+        • Generate alerts within 100ms
+        """
+)
+
+DEMO_SUMMARY = _format_lines(
+    Fore.CYAN + "\n📋 Demo Summary:",
+    "-" * 50,
+    Fore.WHITE + """
+        BisonGuard System Capabilities Demonstrated:
+        
+        ✅ Real-time bison detection with 95% accuracy
+        ✅ Multi-camera support with synchronized processing
+        ✅ Behavior classification (grazing, moving, resting, alert)
+        ✅ Movement pattern analysis and heatmap generation
+        ✅ Intelligent alert system with severity levels
+        ✅ RESTful API and WebSocket real-time streaming
+        ✅ Performance optimized for production deployment
+        
+        The system is ready for deployment in wildlife conservation
+        and research applications.
+        """
+)
 
-# Initialize colorama for Windows color support
-init(autoreset=True)
 
 class BisonGuardDemo:
     """Interactive demo of BisonGuard features"""
@@ -23,299 +201,271 @@ class BisonGuardDemo:
     def __init__(self):
         self.demo_data = self.generate_demo_data()
         self.running = False
+        self._buf = []  # pending output, written in one call by _flush()
+        self._pace = float(os.environ.get('BISONGUARD_DEMO_TICK', DEFAULT_TICK)) / DEFAULT_TICK
+        self._stop = threading.Event()  # set on Ctrl+C so pending pauses end at once
+        self._browser = False  # webbrowser controller, looked up on first use
+        self._menu_drawn = False
+        self._dispatch = {
+            '1': self.demo_live_detection,
+            '2': self.launch_dashboard,
+            '3': self.demo_behavior_analysis,
+            '4': self.demo_movement_patterns,
+            '5': self.demo_alert_system,
+            '6': self.demo_api_testing,
+            '7': self.demo_performance_test,
+            '8': self.run_full_demo,
+            '9': self.exit_demo
+        }
+        
+        # Static screens are formatted once and queued as a single string
+        self._header_str = _format_lines(
+            "\n" + "="*70,
+            Fore.CYAN + Style.BRIGHT + "🦬 BisonGuard Real-time Tracking System Demo 🦬".center(70),
+            "="*70 + "\n"
+        )
+        self._menu_str = _format_lines(
+            Fore.YELLOW + "\nSelect a demo option:",
+            "1. " + Fore.GREEN + "Live Detection Demo" + Fore.RESET + " - Simulate real-time bison detection",
+            "2. " + Fore.GREEN + "Analytics Dashboard" + Fore.RESET + " - Launch the web dashboard",
+            "3. " + Fore.GREEN + "Behavior Analysis" + Fore.RESET + " - Show behavior classification demo",
+            "4. " + Fore.GREEN + "Movement Patterns" + Fore.RESET + " - Demonstrate movement tracking",
+            "5. " + Fore.GREEN + "Alert System" + Fore.RESET + " - Trigger sample alerts",
+            "6. " + Fore.GREEN + "API Testing" + Fore.RESET + " - Test REST API endpoints",
+            "7. " + Fore.GREEN + "Performance Test" + Fore.RESET + " - Run performance benchmarks",
+            "8. " + Fore.GREEN + "Full System Demo" + Fore.RESET + " - Run complete demonstration",
+            "9. " + Fore.RED + "Exit"
+        )
+        
+    def _emit(self, text="", end="\n"):
+        """Queue a line of output, resetting colors at its end if it set any"""
+        self._buf.append(text + Style.RESET_ALL + end if "\x1b" in text else text + end)
+        
+    def _flush(self):
+        """Write all queued output with a single write + flush"""
+        if self._buf:
+            sys.stdout.write("".join(self._buf))
+            self._buf.clear()
+        sys.stdout.flush()
+        
+    def _pause(self, seconds):
+        """Flush queued output, then wait; raises KeyboardInterrupt once the demo is stopped"""
+        self._flush()
+        if self._stop.wait(seconds * self._pace):
+            raise KeyboardInterrupt
+            
+    def _on_interrupt(self, signum, frame):
+        """SIGINT handler: wake any pause and unwind to the menu loop"""
+        self._stop.set()
+        raise KeyboardInterrupt
+        
+    def _get_browser(self):
+        """Return the default browser controller, or None when none is registered (headless)"""
+        if self._browser is False:
+            import webbrowser  # only needed by the dashboard demo
+            try:
+                self._browser = webbrowser.get()
+            except webbrowser.Error:
+                self._browser = None
+        return self._browser
         
     def print_header(self):
         """Print demo header"""
-        print("\n" + "="*70)
-        print(Fore.CYAN + Style.BRIGHT + "🦬 BisonGuard Real-time Tracking System Demo 🦬".center(70))
-        print("="*70 + "\n")
+        self._buf.append(self._header_str)
     
     def print_menu(self):
         """Print demo menu"""
-        print(Fore.YELLOW + "\nSelect a demo option:")
-        print("1. " + Fore.GREEN + "Live Detection Demo" + Fore.RESET + " - Simulate real-time bison detection")
-        print("2. " + Fore.GREEN + "Analytics Dashboard" + Fore.RESET + " - Launch the web dashboard")
-        print("3. " + Fore.GREEN + "Behavior Analysis" + Fore.RESET + " - Show behavior classification demo")
-        print("4. " + Fore.GREEN + "Movement Patterns" + Fore.RESET + " - Demonstrate movement tracking")
-        print("5. " + Fore.GREEN + "Alert System" + Fore.RESET + " - Trigger sample alerts")
-        print("6. " + Fore.GREEN + "API Testing" + Fore.RESET + " - Test REST API endpoints")
-        print("7. " + Fore.GREEN + "Performance Test" + Fore.RESET + " - Run performance benchmarks")
-        print("8. " + Fore.GREEN + "Full System Demo" + Fore.RESET + " - Run complete demonstration")
-        print("9. " + Fore.RED + "Exit" + Fore.RESET)
+        self._buf.append(self._menu_str)
     
     def generate_demo_data(self):
         """Generate sample data for demo"""
+        # Draw every field in one call per column rather than per detection
+        count = random.randint(8, 15) - 1
+        if NUMPY_AVAILABLE:
+            xs = _rng.integers(100, 1801, count).tolist()
+            ys = _rng.integers(100, 901, count).tolist()
+            confidences = _rng.uniform(0.85, 0.99, count).tolist()
+        else:
+            xs = random.choices(range(100, 1801), k=count)
+            ys = random.choices(range(100, 901), k=count)
+            confidences = [0.85 + 0.14 * random.random() for _ in range(count)]
         return {
             'detections': [
-                {'id': i, 'x': random.randint(100, 1800), 
-                 'y': random.randint(100, 900), 
-                 'confidence': random.uniform(0.85, 0.99)}
-                for i in range(1, random.randint(8, 15))
+                {'id': i, 'x': x, 'y': y, 'confidence': c}
+                for i, x, y, c in zip(range(1, count + 1), xs, ys, confidences)
             ],
-            'behaviors': ['grazing', 'moving', 'resting', 'alert'],
-            'cameras': ['North Pasture', 'South Field', 'Water Hole', 'Forest Edge']
+            'behaviors': DEMO_BEHAVIORS,
+            'cameras': DEMO_CAMERAS
         }
     
     def demo_live_detection(self):
         """Demonstrate live detection"""
-        print(Fore.CYAN + "\n🔍 Starting Live Detection Demo...")
-        print("-" * 50)
+        self._emit(Fore.CYAN + "\n🔍 Starting Live Detection Demo...")
+        self._emit("-" * 50)
         
-        for i in range(10):
+        counts = random.choices(range(5, 16), k=10)
+        for i, count in enumerate(counts):
             if not self.running:
                 break
                 
-            count = random.randint(5, 15)
             fps = random.uniform(24, 30)
             confidence = random.uniform(0.85, 0.98)
             
-            print(f"\r{Fore.GREEN}Frame {i*30:4d} | " +
-                  f"{Fore.YELLOW}Bison: {count:2d} | " +
-                  f"{Fore.CYAN}FPS: {fps:.1f} | " +
-                  f"{Fore.MAGENTA}Conf: {confidence:.2%}", end='')
+            if VT_MODE:
+                # One os.write per frame, bypassing the text layer entirely
+                self._flush()
+                os.write(sys.stdout.fileno(), LIVE_STATUS_BYTES % (i*30, count, fps, confidence * 100))
+            else:
+                self._emit(LIVE_STATUS_FMT.format(i*30, count, fps, confidence), end='')
             
-            time.sleep(0.5)
+            self._pause(0.5)
         
-        print(Fore.GREEN + "\n\n✅ Detection demo completed!")
+        self._emit(Fore.GREEN + "\n\n✅ Detection demo completed!")
         self.show_detection_stats()
     
     def show_detection_stats(self):
         """Show detection statistics"""
-        print(Fore.CYAN + "\n📊 Detection Statistics:")
-        print("-" * 50)
-        stats = {
-            'Total Frames': 300,
-            'Total Detections': 3567,
-            'Average Count': 11.9,
-            'Max Count': 18,
-            'Processing Time': '10.2s',
-            'Average FPS': 29.4
-        }
-        
-        for key, value in stats.items():
-            print(f"{Fore.YELLOW}{key:20s}: {Fore.WHITE}{value}")
+        self._emit(Fore.CYAN + "\n📊 Detection Statistics:")
+        self._emit("-" * 50)
+        for key, value in DETECTION_STATS:
+            self._emit(f"{Fore.YELLOW}{key:20s}: {Fore.WHITE}{value}")
     
     def demo_behavior_analysis(self):
         """Demonstrate behavior analysis"""
-        print(Fore.CYAN + "\n🧠 Starting Behavior Analysis Demo...")
-        print("-" * 50)
-        
-        behaviors = {
-            'Grazing': 65,
-            'Moving': 20,
-            'Resting': 10,
-            'Alert': 3,
-            'Unknown': 2
-        }
-        
-        print(Fore.YELLOW + "\nCurrent Behavior Distribution:")
-        for behavior, percentage in behaviors.items():
-            bar = '█' * (percentage // 5)
-            print(f"{behavior:10s} {bar:15s} {percentage:3d}%")
+        self._emit(Fore.CYAN + "\n🧠 Starting Behavior Analysis Demo...")
+        self._emit("-" * 50)
         
-        print(Fore.CYAN + "\n🔄 Analyzing behavior patterns...")
-        time.sleep(2)
+        self._emit(Fore.YELLOW + "\nCurrent Behavior Distribution:")
+        for behavior, percentage in BEHAVIOR_DISTRIBUTION:
+            self._emit(f"{behavior:10s} {BAR_CACHE[percentage]} {percentage:3d}%")
         
-        print(Fore.GREEN + "\n✅ Behavior Insights:")
-        insights = [
-            "• Herd is primarily in grazing mode (normal for afternoon)",
-            "• Low alert percentage indicates calm environment",
-            "• Movement pattern suggests migration to water source",
-            "• No unusual behavior detected"
-        ]
+        self._emit(Fore.CYAN + "\n🔄 Analyzing behavior patterns...")
+        self._pause(2)
         
-        for insight in insights:
-            print(Fore.WHITE + insight)
-            time.sleep(0.5)
+        self._emit(Fore.GREEN + "\n✅ Behavior Insights:")
+        for insight in BEHAVIOR_INSIGHTS:
+            self._emit(Fore.WHITE + insight)
+            self._pause(0.5)
     
     def demo_movement_patterns(self):
         """Demonstrate movement pattern analysis"""
-        print(Fore.CYAN + "\n🗺️ Starting Movement Pattern Demo...")
-        print("-" * 50)
-        
-        patterns = [
-            ("Linear Movement", "North → South", "2.3 km/h"),
-            ("Circular Pattern", "Around water hole", "0.8 km/h"),
-            ("Dispersed Grazing", "North Pasture", "0.3 km/h"),
-            ("Convergence", "Towards shelter", "3.5 km/h")
-        ]
+        self._emit(Fore.CYAN + "\n🗺️ Starting Movement Pattern Demo...")
+        self._emit("-" * 50)
         
-        print(Fore.YELLOW + "\nDetected Movement Patterns:")
-        for pattern, location, speed in patterns:
-            print(f"\n{Fore.GREEN}Pattern: {Fore.WHITE}{pattern}")
-            print(f"{Fore.GREEN}Location: {Fore.WHITE}{location}")
-            print(f"{Fore.GREEN}Speed: {Fore.WHITE}{speed}")
-            time.sleep(1)
+        self._emit(Fore.YELLOW + "\nDetected Movement Patterns:")
+        for pattern, location, speed in MOVEMENT_PATTERNS:
+            self._emit(f"\n{Fore.GREEN}Pattern: {Fore.WHITE}{pattern}")
+            self._emit(f"{Fore.GREEN}Location: {Fore.WHITE}{location}")
+            self._emit(f"{Fore.GREEN}Speed: {Fore.WHITE}{speed}")
+            self._pause(1)
         
         self.show_movement_visualization()
     
     def show_movement_visualization(self):
         """Show ASCII movement visualization"""
-        print(Fore.CYAN + "\n📍 Movement Heatmap (ASCII Visualization):")
-        print("-" * 50)
-        
-        # Create simple ASCII heatmap
-        grid = []
-        for _ in range(10):
-            row = []
-            for _ in range(40):
-                intensity = random.choice(['.', '.', 'o', 'O', '@'])
-                row.append(intensity)
-            grid.append(''.join(row))
-        
-        for row in grid:
-            colored_row = row.replace('@', Fore.RED + '@' + Fore.RESET)
-            colored_row = colored_row.replace('O', Fore.YELLOW + 'O' + Fore.RESET)
-            colored_row = colored_row.replace('o', Fore.GREEN + 'o' + Fore.RESET)
-            print(colored_row)
-        
-        print(Fore.WHITE + "\nLegend: . = No activity | o = Low | O = Medium | @ = High")
+        self._emit(Fore.CYAN + "\n📍 Movement Heatmap (ASCII Visualization):")
+        self._emit("-" * 50)
+        
+        # Create simple ASCII heatmap: draw all 400 colored cells at once, then emit 40-cell rows
+        if NUMPY_AVAILABLE:
+            grid = _PALETTE_ARRAY[_rng.integers(0, len(PALETTE), size=(10, 40))]
+            for row in grid.tolist():
+                self._emit(''.join(row))
+        else:
+            cells = random.choices(PALETTE, k=400)
+            for start in range(0, 400, 40):
+                self._emit(''.join(cells[start:start + 40]))
+        
+        self._emit(Fore.WHITE + "\nLegend: . = No activity | o = Low | O = Medium | @ = High")
     
     def demo_alert_system(self):
         """Demonstrate alert system"""
-        print(Fore.CYAN + "\n🚨 Starting Alert System Demo...")
-        print("-" * 50)
-        
-        alerts = [
-            ("LOW", "Bison entering restricted area", "14:23:15"),
-            ("MEDIUM", "Unusual clustering detected", "14:25:42"),
-            ("HIGH", "Rapid movement detected - possible predator", "14:28:03"),
-            ("INFO", "New bison entered monitoring zone", "14:30:21")
-        ]
+        self._emit(Fore.CYAN + "\n🚨 Starting Alert System Demo...")
+        self._emit("-" * 50)
         
-        print(Fore.YELLOW + "\nTriggering Sample Alerts:\n")
-        
-        for severity, message, timestamp in alerts:
-            if severity == "HIGH":
-                color = Fore.RED + Style.BRIGHT
-                symbol = "⚠️"
-            elif severity == "MEDIUM":
-                color = Fore.YELLOW
-                symbol = "⚡"
-            elif severity == "LOW":
-                color = Fore.CYAN
-                symbol = "ℹ️"
-            else:
-                color = Fore.GREEN
-                symbol = "✓"
-            
-            print(f"{color}[{timestamp}] {symbol} {severity:7s} | {message}{Style.RESET_ALL}")
-            time.sleep(1)
+        self._emit(Fore.YELLOW + "\nTriggering Sample Alerts:\n")
+        
+        for severity, message, timestamp in SAMPLE_ALERTS:
+            color, symbol = SEVERITY_STYLE.get(severity, SEVERITY_STYLE["INFO"])
+            self._emit(f"{color}[{timestamp}] {symbol} {severity:7s} | {message}")
+            self._pause(1)
         
-        print(Fore.GREEN + "\n✅ All alerts have been logged and notifications sent!")
+        self._emit(Fore.GREEN + "\n✅ All alerts have been logged and notifications sent!")
     
     def demo_api_testing(self):
         """Test API endpoints"""
-        print(Fore.CYAN + "\n🔌 Starting API Testing Demo...")
-        print("-" * 50)
-        
-        endpoints = [
-            ("GET", "/api/detections", "200 OK", "Current detections retrieved"),
-            ("GET", "/api/analytics/behavior", "200 OK", "Behavior data fetched"),
-            ("GET", "/api/analytics/movement", "200 OK", "Movement patterns analyzed"),
-            ("POST", "/api/alerts/acknowledge/1", "200 OK", "Alert acknowledged"),
-            ("GET", "/api/cameras", "200 OK", "Camera list retrieved"),
-            ("WebSocket", "/socket.io", "Connected", "Real-time stream established")
-        ]
+        self._emit(Fore.CYAN + "\n🔌 Starting API Testing Demo...")
+        self._emit("-" * 50)
         
-        print(Fore.YELLOW + "\nTesting API Endpoints:\n")
+        self._emit(Fore.YELLOW + "\nTesting API Endpoints:\n")
         
-        for method, endpoint, status, description in endpoints:
-            print(f"{Fore.GREEN}{method:10s} {Fore.WHITE}{endpoint:30s} ", end='')
-            time.sleep(0.5)
+        for method, endpoint, status, description, succeeded in API_ENDPOINTS:
+            self._emit(f"{Fore.GREEN}{method:10s} {Fore.WHITE}{endpoint:30s} ", end='')
+            self._pause(0.5)
             
-            if "200" in status or "Connected" in status:
-                print(f"{Fore.GREEN}[{status}] ✓")
-                print(f"           {Fore.CYAN}→ {description}")
+            if succeeded:
+                self._emit(f"{Fore.GREEN}[{status}] ✓")
+                self._emit(f"           {Fore.CYAN}→ {description}")
             else:
-                print(f"{Fore.RED}[{status}] ✗")
+                self._emit(f"{Fore.RED}[{status}] ✗")
             
-            time.sleep(0.5)
+            self._pause(0.5)
         
-        print(Fore.GREEN + "\n✅ API testing completed successfully!")
+        self._emit(Fore.GREEN + "\n✅ API testing completed successfully!")
     
     def demo_performance_test(self):
         """Run performance benchmarks"""
-        print(Fore.CYAN + "\n⚡ Starting Performance Test...")
-        print("-" * 50)
-        
-        tests = [
-            ("Video Processing", "1080p @ 30fps", "28.5 FPS", "✓"),
-            ("Detection Accuracy", "Test Dataset", "94.7%", "✓"),
-            ("Tracking Consistency", "30 min video", "98.2%", "✓"),
-            ("API Response Time", "100 requests", "45ms avg", "✓"),
-            ("Memory Usage", "4 cameras", "1.8GB", "✓"),
-            ("CPU Usage", "Full load", "68%", "✓"),
-            ("WebSocket Latency", "1000 events", "12ms", "✓")
-        ]
+        self._emit(Fore.CYAN + "\n⚡ Starting Performance Test...")
+        self._emit("-" * 50)
         
-        print(Fore.YELLOW + "\nRunning Performance Benchmarks:\n")
+        self._emit(Fore.YELLOW + "\nRunning Performance Benchmarks:\n")
         
-        for test, input_data, result, status in tests:
-            print(f"{Fore.WHITE}{test:20s} | {input_data:15s} | ", end='')
-            
-            # Simulate processing
-            for _ in range(3):
-                print(".", end='', flush=True)
-                time.sleep(0.3)
+        for test, input_data, result, status in PERFORMANCE_TESTS:
+            # Simulate processing: the row and its progress dots go out in one write
+            self._emit(f"{Fore.WHITE}{test:20s} | {input_data:15s} | ...", end='')
+            self._pause(0.9)
             
-            print(f" {Fore.GREEN}{result:10s} {status}")
+            self._emit(f" {Fore.GREEN}{result:10s} {status}")
         
-        print(Fore.GREEN + "\n✅ All performance tests passed!")
+        self._emit(Fore.GREEN + "\n✅ All performance tests passed!")
         self.show_performance_summary()
     
     def show_performance_summary(self):
         """Show performance summary"""
-        print(Fore.CYAN + "\n📈 Performance Summary:")
-        print("-" * 50)
-        
-        print(Fore.WHITE + """
-        System Capabilities:
-        • Process 6 camera feeds simultaneously
-        • Maintain 25+ FPS with GPU acceleration
-        • Track up to 50 bison per frame
-        • Store 30 days of historical data
-        • Support 100+ concurrent web clients
-        • Generate alerts within 100ms
-        """)
+        self._buf.append(PERF_SUMMARY)
     
     def launch_dashboard(self):
         """Launch the web dashboard"""
-        print(Fore.CYAN + "\n🌐 Launching Web Dashboard...")
-        print("-" * 50)
+        self._emit(Fore.CYAN + "\n🌐 Launching Web Dashboard...")
+        self._emit("-" * 50)
         
-        print(Fore.YELLOW + "Starting Flask server...")
-        time.sleep(1)
+        self._emit(Fore.YELLOW + "Starting Flask server...")
+        self._pause(1)
         
-        print(Fore.GREEN + "✓ Server started on http://localhost:5000")
-        print(Fore.YELLOW + "\nOpening browser...")
+        self._emit(Fore.GREEN + "✓ Server started on http://localhost:5000")
+        self._emit(Fore.YELLOW + "\nOpening browser...")
         
-        # Try to open browser
+        # Try to open browser, only if one is registered
+        import webbrowser
+        browser = self._get_browser()
         try:
-            webbrowser.open('http://localhost:5000')
-            print(Fore.GREEN + "✓ Browser opened successfully!")
-        except:
-            print(Fore.YELLOW + "Please open http://localhost:5000 in your browser")
-        
-        print(Fore.CYAN + "\nDashboard Features:")
-        features = [
-            "• Real-time video feeds",
-            "• Live detection statistics",
-            "• Interactive analytics charts",
-            "• Behavior classification",
-            "• Movement heatmaps",
-            "• Alert management",
-            "• Data export tools"
-        ]
-        
-        for feature in features:
-            print(Fore.WHITE + feature)
-            time.sleep(0.3)
+            opened = browser is not None and browser.open('http://localhost:5000')
+        except (webbrowser.Error, OSError):
+            opened = False
+        if opened:
+            self._emit(Fore.GREEN + "✓ Browser opened successfully!")
+        else:
+            self._emit(Fore.YELLOW + "Please open http://localhost:5000 in your browser")
+        
+        self._emit(Fore.CYAN + "\nDashboard Features:")
+        for feature in DASHBOARD_FEATURES:
+            self._emit(Fore.WHITE + feature)
+            self._pause(0.3)
     
     def run_full_demo(self):
         """Run complete system demonstration"""
-        print(Fore.CYAN + Style.BRIGHT + "\n🎬 Starting Full System Demo...")
-        print("="*70)
+        self._emit(Fore.CYAN + Style.BRIGHT + "\n🎬 Starting Full System Demo...")
+        self._emit("="*70)
         
         demos = [
             ("Detection", self.demo_live_detection),
@@ -326,76 +476,61 @@ class BisonGuardDemo:
             ("Performance", self.demo_performance_test)
         ]
         
-        for name, demo_func in demos:
-            print(Fore.YELLOW + f"\n[{demos.index((name, demo_func)) + 1}/{len(demos)}] Running {name} Demo...")
+        for idx, (name, demo_func) in enumerate(demos, 1):
+            self._emit(Fore.YELLOW + f"\n[{idx}/{len(demos)}] Running {name} Demo...")
             demo_func()
-            time.sleep(2)
+            self._pause(2)
         
-        print(Fore.GREEN + Style.BRIGHT + "\n" + "="*70)
-        print("🎉 Full System Demo Completed Successfully! 🎉".center(70))
-        print("="*70)
+        self._emit(Fore.GREEN + Style.BRIGHT + "\n" + "="*70)
+        self._emit("🎉 Full System Demo Completed Successfully! 🎉".center(70))
+        self._emit("="*70)
         
         self.show_summary()
     
     def show_summary(self):
         """Show demo summary"""
-        print(Fore.CYAN + "\n📋 Demo Summary:")
-        print("-" * 50)
-        
-        print(Fore.WHITE + """
-        BisonGuard System Capabilities Demonstrated:
-        
-        ✅ Real-time bison detection with 95% accuracy
-        ✅ Multi-camera support with synchronized processing
-        ✅ Behavior classification (grazing, moving, resting, alert)
-        ✅ Movement pattern analysis and heatmap generation
-        ✅ Intelligent alert system with severity levels
-        ✅ RESTful API and WebSocket real-time streaming
-        ✅ Performance optimized for production deployment
-        
-        The system is ready for deployment in wildlife conservation
-        and research applications.
-        """)
+        self._buf.append(DEMO_SUMMARY)
+    
+    def exit_demo(self):
+        """Say goodbye and leave the menu loop"""
+        self._emit(Fore.YELLOW + "\nThank you for using BisonGuard Demo!")
+        self._emit(Fore.GREEN + "Visit https://github.com/yourusername/BisonGuard for more information.")
+        self.running = False
     
     def run(self):
         """Run the demo"""
         self.print_header()
         self.running = True
+        signal.signal(signal.SIGINT, self._on_interrupt)
         
         while self.running:
-            self.print_menu()
+            # Only redraw the menu after something else has been printed below it
+            if not self._menu_drawn:
+                self.print_menu()
+                self._menu_drawn = True
+            self._flush()
             
             try:
                 choice = input(Fore.CYAN + "\nEnter your choice (1-9): " + Fore.WHITE)
                 
-                if choice == '1':
-                    self.demo_live_detection()
-                elif choice == '2':
-                    self.launch_dashboard()
-                elif choice == '3':
-                    self.demo_behavior_analysis()
-                elif choice == '4':
-                    self.demo_movement_patterns()
-                elif choice == '5':
-                    self.demo_alert_system()
-                elif choice == '6':
-                    self.demo_api_testing()
-                elif choice == '7':
-                    self.demo_performance_test()
-                elif choice == '8':
-                    self.run_full_demo()
-                elif choice == '9':
-                    print(Fore.YELLOW + "\nThank you for using BisonGuard Demo!")
-                    print(Fore.GREEN + "Visit https://github.com/yourusername/BisonGuard for more information.")
-                    self.running = False
-                else:
-                    print(Fore.RED + "Invalid choice. Please try again.")
+                action = self._dispatch.get(choice)
+                if action is None:
+                    # The menu is still on screen; just prompt again
+                    if choice:
+                        self._emit(Fore.RED + "Invalid choice. Please try again.")
+                    continue
+                    
+                self._menu_drawn = False
+                action()
             
             except KeyboardInterrupt:
-                print(Fore.YELLOW + "\n\nDemo interrupted by user.")
+                self._emit(Fore.YELLOW + "\n\nDemo interrupted by user.")
                 self.running = False
             except Exception as e:
-                print(Fore.RED + f"\nError: {e}")
+                self._emit(Fore.RED + f"\nError: {e}")
+                self._menu_drawn = False
+                
+        self._flush()
 
 
 def main():
@@ -405,13 +540,9 @@ def main():
         print(Fore.RED + "Error: Python 3.8 or higher is required.")
         sys.exit(1)
     
-    # Check if colorama is installed
-    try:
-        import colorama
-    except ImportError:
-        print("Installing required package: colorama...")
-        os.system("pip install colorama")
-        import colorama
+    # Demo output is flushed explicitly, so stdout needs no line buffering
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False, write_through=False)
     
     # Run demo
     demo = BisonGuardDemo()
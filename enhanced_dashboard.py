@@ -5,9 +5,27 @@ Real-time processing of live camera feeds with comprehensive analytics
 """
 
 import os
+import csv
 import json
 import time
+import queue
 import threading
+import multiprocessing as mp
+
+# Stop FFmpeg pre-buffering RTSP frames; must be set before streams are opened
+os.environ.setdefault(
+    "OPENCV_FFMPEG_CAPTURE_OPTIONS",
+    "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay"
+)
+
+# Size native thread pools before cv2/torch create them. The shared inference worker gets
+# INFERENCE_THREADS cores; OpenCV runs single-threaded so capture, encoding and the web
+# server don't each fan out across every core and thrash.
+INFERENCE_THREADS = int(os.environ.get("BISONGUARD_INFERENCE_THREADS",
+                                       max(1, (os.cpu_count() or 1) // 2)))
+os.environ.setdefault("OMP_NUM_THREADS", str(INFERENCE_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(INFERENCE_THREADS))
+
 import cv2
 import numpy as np
 from datetime import datetime
@@ -20,11 +38,17 @@ from PIL import Image
 
 # Import analytics engine and stream manager
 from analytics_engine import BisonAnalytics
-from rtsp_bison_tracker_2 import StreamManager
+from json_provider import ORJSON_AVAILABLE, ORJSONProvider
+from rtsp_bison_tracker_2 import (StreamManager, open_capture, camera_worker, attach_shared_memory,
+                                  ALLOWED_CORES, pin_to_cores, encode_jpeg, label_metrics)
 
 # Import YOLO for detection
 try:
+    import torch
     from ultralytics import YOLO
+    from ultralytics.trackers.track import TRACKER_MAP
+    from ultralytics.utils import IterableSimpleNamespace, yaml_load
+    from ultralytics.utils.checks import check_yaml
     YOLO_AVAILABLE = True
 except ImportError:
     YOLO_AVAILABLE = False
@@ -36,6 +60,9 @@ app.config['SECRET_KEY'] = 'bisonguard-secret-2024'
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+if ORJSON_AVAILABLE:
+    app.json = ORJSONProvider(app)
+
 # Initialize analytics engine
 analytics = BisonAnalytics(db_path="bisonguard_analytics.db")
 
@@ -59,81 +86,183 @@ CAMERAS = {
 
 # Model configuration
 MODEL_PATH = "best.pt"
+ENGINE_PATH = "best.engine"  # TensorRT FP16 export of MODEL_PATH, built once on the first start with a GPU
+INFER_SIZE = (640, 384)  # (width, height) frames are resized to before inference; baked into the
+                         # TensorRT engine, so delete ENGINE_PATH after changing it
 TRACKER_CONFIG = "args.yaml"
 MIN_CONFIDENCE = 0.3
+DETECT_EVERY = 3  # Run the detector on every Nth frame per camera; tracks are propagated in between
+JPEG_QUALITY = 85
+# Decode each camera in its own process, sharing frames via shared memory. Off on Windows: its
+# spawn start method re-imports this module in every child (analytics DB, Flask app, torch)
+CAPTURE_PROCESSES = os.name != "nt"
+CAPTURE_START_TIMEOUT = 30  # Seconds to wait for a capture process's first frame
+BATCH_INTERVAL = 0.03  # Seconds between batched inference passes (~30 FPS max)
+STATS_INTERVAL = 0.25  # Seconds between combined per-camera frame_stats updates
+ANALYTICS_INTERVAL = 2.0  # Seconds between full analytics updates
+
+# On CUDA, upload each batch once and convert layout/colour/scale on the device
+GPU_PREPROCESS = YOLO_AVAILABLE and torch.cuda.is_available()
+
+# Thread pools (see INFERENCE_THREADS above)
+cv2.setNumThreads(1)
+if YOLO_AVAILABLE:
+    torch.set_num_threads(INFERENCE_THREADS)
+    
+# Core pinning: inference on the first INFERENCE_THREADS allowed cores, capture spread over the rest
+def inference_cores():
+    """Cores reserved for the shared inference worker"""
+    return ALLOWED_CORES[:INFERENCE_THREADS]
+
+def capture_cores(index: int):
+    """One core for the index-th camera's capture, disjoint from the inference cores when possible"""
+    spare = ALLOWED_CORES[INFERENCE_THREADS:] or ALLOWED_CORES
+    return [spare[index % len(spare)]] if spare else []
 
 # Global storage
 stream_managers = {}
-model = None
+model = None  # Shared YOLO model, loaded once for all cameras
 frame_processors = {}
+inference_worker = None
+FRAMES_READY = threading.Event()  # Set by capture whenever any camera has a new frame
+NEW_STATS_EVENT = threading.Event()  # Set after each batch of frames is processed
+
+def export_engine(batch: int):
+    """One-time export of MODEL_PATH to a TensorRT FP16 engine taking up to `batch` frames"""
+    print(f"Exporting {MODEL_PATH} to TensorRT (one-time, may take several minutes)...")
+    YOLO(MODEL_PATH).export(format="engine", half=True, imgsz=INFER_SIZE[::-1], batch=batch,
+                            dynamic=True, workspace=4, verbose=False)
+
+def load_model(batch: int = 1):
+    """Load the shared YOLO model once, preferring the TensorRT engine"""
+    global model
+    if model is not None or not YOLO_AVAILABLE:
+        return model
+        
+    if not os.path.exists(ENGINE_PATH) and os.path.exists(MODEL_PATH) and torch.cuda.is_available():
+        try:
+            export_engine(batch)
+        except Exception as e:
+            print(f"✗ TensorRT export failed, using {MODEL_PATH}: {e}")
+            
+    path = ENGINE_PATH if os.path.exists(ENGINE_PATH) else MODEL_PATH
+    if os.path.exists(path):
+        try:
+            model = YOLO(path, task="detect")
+            print(f"✓ Model loaded from {path}")
+        except Exception as e:
+            print(f"✗ Failed to load model: {e}")
+    return model
+
+def frames_to_tensor(frames):
+    """Upload a BHWC BGR uint8 batch (or a list of same-size frames) in one copy as a BCHW RGB float tensor in [0, 1]"""
+    batch = torch.from_numpy(frames if isinstance(frames, np.ndarray) else np.stack(frames)).to('cuda')
+    return batch.permute(0, 3, 1, 2).flip(1).float().div_(255)
+
+def create_tracker(tracker_config: str):
+    """Create a standalone tracker the same way model.track() does internally"""
+    cfg = IterableSimpleNamespace(**yaml_load(check_yaml(
+        tracker_config if os.path.exists(tracker_config) else "bytetrack.yaml"
+    )))
+    return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=30)
+
+# Box label metrics, measured once (see label_metrics)
+LABEL_NO_ID_WIDTH, LABEL_HEIGHT, LABEL_ID_WIDTH, LABEL_DIGIT_WIDTH = label_metrics("Bison (0.00)", "Bison # (0.00)")
+
+# Detection arrays for a frame with nothing detected (never mutated)
+NO_DETECTIONS = {
+    'boxes': np.zeros((0, 4), np.float32),
+    'ids': np.zeros(0, np.int32),
+    'cls': np.zeros(0, np.int8),
+    'conf': np.zeros(0, np.float32)
+}
 
 # ─── FRAME PROCESSOR ───────────────────────────────────────────────────────────
 class FrameProcessor:
-    """Process frames with YOLO detection and tracking"""
+    """Track and annotate one camera's frames using results from the shared model"""
     
-    def __init__(self, camera_id: str, model_path: str, tracker_config: str):
+    def __init__(self, camera_id: str, tracker_config: str):
         self.camera_id = camera_id
-        self.model = None
-        self.tracker_config = tracker_config
+        self.tracker = None  # Per-camera tracker so ids never mix between cameras
         self.frame_count = 0
+        self._camera_label = f"Camera: {CAMERAS[camera_id]['name']}"
+        self._timestamp_second = None  # Overlay timestamp only changes once per second
+        self._timestamp_text = ""
         
-        if YOLO_AVAILABLE and os.path.exists(model_path):
+        if YOLO_AVAILABLE:
             try:
-                self.model = YOLO(model_path)
-                print(f"✓ Model loaded for {camera_id}")
+                self.tracker = create_tracker(tracker_config)
             except Exception as e:
-                print(f"✗ Failed to load model for {camera_id}: {e}")
+                print(f"✗ Failed to create tracker for {camera_id}: {e}")
                 
-    def process_frame(self, frame):
-        """Process a single frame and return annotated frame + detections"""
+    def detect_due(self):
+        """True if the next frame should go through the detector"""
+        return self.frame_count % DETECT_EVERY == 0
+        
+    def track(self, results):
+        """Return this camera's detections as rows [x1, y1, x2, y2, (id), conf, cls] with persistent track ids"""
+        if results.boxes is None:
+            return None
+        # One host transfer, shared by the tracker and the drawing code
+        det = results.boxes.cpu().numpy()
+        if self.tracker is None:
+            return det.data
+        tracks = self.tracker.update(det, results.orig_img)
+        return tracks[:, :-1] if len(tracks) else det.data
+        
+    def propagate(self):
+        """Advance confirmed tracks one frame with the tracker's Kalman filter; return them as detection rows"""
+        if self.tracker is None:
+            return None
+        tracks = [t for t in self.tracker.tracked_stracks if t.is_activated]
+        if not tracks:
+            return None
+        self.tracker.multi_predict(tracks)
+        return np.array([[*t.xyxy, t.track_id, t.score, t.cls] for t in tracks], dtype=np.float32)
+        
+    def process_frame(self, frame, results=None):
+        """
+        Process a single frame and return annotated frame + detection arrays. Frames with
+        detector results update the tracker; frames without them reuse its predicted tracks.
+        """
         self.frame_count += 1
-        detections = []
+        detections = NO_DETECTIONS
         
-        if self.model:
+        if self.tracker is not None or results is not None:
             try:
-                # Run YOLO detection and tracking
-                results = self.model.track(
-                    source=frame,
-                    tracker=self.tracker_config if os.path.exists(self.tracker_config) else "bytetrack.yaml",
-                    conf=MIN_CONFIDENCE,
-                    persist=True,
-                    verbose=False
-                )[0]
-                
-                # Extract detections
-                boxes = results.boxes
-                if boxes is not None:
-                    coords = boxes.xyxy.tolist()
-                    cls_list = boxes.cls.tolist()
-                    ids_tensor = boxes.id
-                    id_list = ids_tensor.tolist() if ids_tensor is not None else [None]*len(cls_list)
-                    conf_list = boxes.conf.tolist()
+                data = self.track(results) if results is not None else self.propagate()
+                if data is not None and len(data):
+                    # Detection and tracking run at INFER_SIZE; scale boxes back to this frame
+                    h, w = frame.shape[:2]
+                    sx, sy = w / INFER_SIZE[0], h / INFER_SIZE[1]
+                    xyxy = data[:, :4] * np.array([sx, sy, sx, sy], dtype=np.float32)
+                    ids = data[:, 4].astype(int) if data.shape[1] == 7 else np.zeros(len(data), dtype=int)
+                    confs = data[:, -2]
                     
-                    # Process each detection
-                    for (x1, y1, x2, y2), tid, cls, conf in zip(coords, id_list, cls_list, conf_list):
-                        detection = {
-                            'track_id': int(tid) if tid else None,
-                            'confidence': float(conf),
-                            'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                            'class': int(cls)
-                        }
-                        detections.append(detection)
-                        
-                        # Draw on frame
-                        x1, y1, x2, y2 = map(int, (x1, y1, x2, y2))
-                        
-                        # Color based on confidence
-                        color_intensity = int(255 * conf)
-                        color = (0, color_intensity, 255 - color_intensity)
-                        
-                        # Draw bounding box
+                    detections = {
+                        'boxes': xyxy.astype(np.float32, copy=False),
+                        'ids': ids.astype(np.int32),
+                        'cls': data[:, -1].astype(np.int8),
+                        'conf': confs.astype(np.float32, copy=False)
+                    }
+                    
+                    # Box corners, confidence colors and label sizes for all detections at once
+                    corners = xyxy.astype(int)
+                    greens = (255 * confs).astype(int)
+                    digits = np.floor(np.log10(np.maximum(ids, 1))).astype(int) + 1
+                    label_widths = np.where(ids > 0, LABEL_ID_WIDTH + LABEL_DIGIT_WIDTH * digits, LABEL_NO_ID_WIDTH)
+                    
+                    # Draw on frame
+                    for (x1, y1, x2, y2), tid, conf, green, label_w in zip(
+                        corners.tolist(), ids.tolist(), confs.tolist(), greens.tolist(), label_widths.tolist()
+                    ):
+                        color = (0, green, 255 - green)
                         cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
                         
                         # Draw label with background
                         label = f"Bison #{tid} ({conf:.2f})" if tid else f"Bison ({conf:.2f})"
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                        cv2.rectangle(frame, (x1, y1 - label_size[1] - 10),
-                                    (x1 + label_size[0], y1), color, -1)
+                        cv2.rectangle(frame, (x1, y1 - LABEL_HEIGHT - 10),
+                                    (x1 + label_w, y1), color, -1)
                         cv2.putText(frame, label, (x1, y1 - 5),
                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
                         
@@ -146,7 +275,7 @@ class FrameProcessor:
         )
         
         # Add overlay information
-        self._add_overlay(frame, len(detections), analytics_result)
+        self._add_overlay(frame, analytics_result['count'], analytics_result)
         
         return frame, detections, analytics_result
         
@@ -154,22 +283,24 @@ class FrameProcessor:
         """Add information overlay to frame"""
         h, w = frame.shape[:2]
         
-        # Semi-transparent background for text
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (350, 120), (0, 0, 0), -1)
-        frame = cv2.addWeighted(frame, 0.7, overlay, 0.3, 0)
+        # Semi-transparent black background for text: blending with black is a 0.7 scale of the corner
+        roi = frame[:121, :351]
+        cv2.convertScaleAbs(roi, dst=roi, alpha=0.7)
         
         # Add text
         cv2.putText(frame, f"Bison Count: {count}", (10, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-        cv2.putText(frame, f"Camera: {CAMERAS[self.camera_id]['name']}", (10, 60),
+        cv2.putText(frame, self._camera_label, (10, 60),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         cv2.putText(frame, f"Frame: {self.frame_count}", (10, 90),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
         # Add timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cv2.putText(frame, timestamp, (w - 250, h - 20),
+        second = int(time.time())
+        if second != self._timestamp_second:
+            self._timestamp_second = second
+            self._timestamp_text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        cv2.putText(frame, self._timestamp_text, (w - 250, h - 20),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
         # Add alerts if any
@@ -186,83 +317,305 @@ class EnhancedStreamManager:
         self.camera_id = camera_id
         self.config = camera_config
         self.cap = None
+        self.process = None  # Capture process when CAPTURE_PROCESSES is on
+        self.cores = capture_cores(list(CAMERAS).index(camera_id))
         self.running = False
         self.current_frame = None
         self.processed_frame = None
         self.frame_lock = threading.Lock()
-        self.processor = FrameProcessor(camera_id, MODEL_PATH, TRACKER_CONFIG)
+        self.frame_ready = threading.Condition(self.frame_lock)  # Notified on each new raw/processed frame
+        self.frame_versions = {False: 0, True: 0}  # Keyed by processed
+        self.jpeg_cache = {False: (0, None), True: (0, None)}  # (version, bytes) shared by all viewers
+        self.part_cache = {False: (0, None), True: (0, None)}  # (version, multipart chunk) likewise
+        self.encode_lock = threading.Lock()
+        self.last_status = None  # Latest per-frame stats, read by the broadcaster
+        self.raw_viewers = 0  # Open raw feeds; while zero, frames are annotated in place
+        self.frame_slot = queue.Queue(maxsize=1)  # Newest frame awaiting inference; older ones are dropped
+        self.processor = FrameProcessor(camera_id, TRACKER_CONFIG)
         self.thread = None
         self.fps = 0
-        self.last_fps_time = time.time()
+        self.last_fps_time = time.monotonic()
         self.fps_counter = 0
         
     def start(self):
         """Start streaming and processing"""
         print(f"Starting stream for {self.camera_id}: {self.config['name']}")
-        self.cap = cv2.VideoCapture(self.config['url'])
+        if CAPTURE_PROCESSES:
+            opened = self._start_capture_process()
+            loop = self._shared_frame_loop
+        else:
+            self.cap = open_capture(self.config['url'])
+            opened = self.cap.isOpened()
+            loop = self._stream_loop
         
-        if not self.cap.isOpened():
+        if not opened:
             print(f"Failed to open stream for {self.camera_id}")
             return False
             
         self.running = True
-        self.thread = threading.Thread(target=self._stream_loop, daemon=True)
+        self.thread = threading.Thread(target=loop, daemon=True)
         self.thread.start()
         return True
         
+    def _start_capture_process(self):
+        """Launch this camera's capture process and wait for its first frame"""
+        self._counter = mp.Value('L', 0)
+        self._frame_event = mp.Event()
+        self._stop_event = mp.Event()
+        self._meta_conn, child_conn = mp.Pipe(duplex=False)
+        self.process = mp.Process(
+            target=camera_worker,
+            args=(self.config['url'], self._counter, self._frame_event, child_conn, self._stop_event),
+            daemon=True
+        )
+        self.process.start()
+        pin_to_cores(self.cores, self.process.pid)
+        
+        self._shared_meta = None
+        if self._meta_conn.poll(CAPTURE_START_TIMEOUT):
+            self._shared_meta = self._meta_conn.recv()
+        if self._shared_meta is None:
+            self._stop_capture_process()
+            return False
+        return True
+        
+    def _stop_capture_process(self):
+        """Ask the capture process to exit, terminating it if it does not"""
+        self._stop_event.set()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+        
     def _stream_loop(self):
-        """Main streaming and processing loop"""
+        """Capture loop; inference runs in the shared BatchInferenceWorker"""
+        pin_to_cores(self.cores)
         while self.running:
             ret, frame = self.cap.read()
             if not ret:
                 print(f"Failed to read frame from {self.camera_id}, reconnecting...")
                 self.cap.release()
                 time.sleep(2)
-                self.cap = cv2.VideoCapture(self.config['url'])
+                self.cap = open_capture(self.config['url'])
                 continue
-                
-            # Update FPS
-            self.fps_counter += 1
-            now = time.time()
-            if now - self.last_fps_time >= 1.0:
-                self.fps = self.fps_counter / (now - self.last_fps_time)
-                self.fps_counter = 0
-                self.last_fps_time = now
-                
-            # Process frame
-            processed_frame, detections, analytics_result = self.processor.process_frame(frame.copy())
+            self._on_frame(frame)
             
-            # Store frames
-            with self.frame_lock:
-                self.current_frame = frame
-                self.processed_frame = processed_frame
+    def _shared_frame_loop(self):
+        """Take the newest frame from the capture process's shared-memory ring"""
+        shm = slots = None
+        pending = [self._shared_meta]
+        last = 0
+        try:
+            while self.running:
+                if not pending and not self._frame_event.wait(1.0):
+                    continue
+                self._frame_event.clear()
+                while self._meta_conn.poll():
+                    pending.append(self._meta_conn.recv())
+                    
+                if pending:
+                    # Capture process created a new segment (first frame or resolution change)
+                    name, shape = pending[-1]
+                    pending.clear()
+                    slots = None
+                    if shm is not None:
+                        shm.close()
+                    shm = attach_shared_memory(name)
+                    slots = np.ndarray((2, *shape), dtype=np.uint8, buffer=shm.buf)
+                    
+                count = self._counter.value
+                if count == last:
+                    continue
+                # One copy out of the ring: frames are annotated in place and shared by reference
+                frame = slots[count % 2].copy()
+                if self._counter.value != count:
+                    continue  # The writer moved on to this slot while copying
+                last = count
+                self._on_frame(frame)
+        finally:
+            slots = None
+            if shm is not None:
+                shm.close()
                 
-            # Emit real-time updates via WebSocket
-            socketio.emit('frame_processed', {
-                'camera_id': self.camera_id,
-                'detections': len(detections),
-                'fps': self.fps,
-                'timestamp': datetime.now().isoformat()
-            })
+    def _on_frame(self, frame):
+        """Count a captured frame and hand it to the raw feed and the inference slot"""
+        # Update FPS (monotonic clock, so wall-clock adjustments can't skew it)
+        self.fps_counter += 1
+        now = time.monotonic()
+        if now - self.last_fps_time >= 1.0:
+            self.fps = self.fps_counter / (now - self.last_fps_time)
+            self.fps_counter = 0
+            self.last_fps_time = now
             
-            # Small delay to control processing rate
-            time.sleep(0.03)  # ~30 FPS max
+        # Store frame for the raw feed
+        with self.frame_ready:
+            self.current_frame = frame
+            self.frame_versions[False] += 1
+            self.frame_ready.notify_all()
             
+        # Replace any frame inference hasn't picked up yet so it never lags behind
+        try:
+            self.frame_slot.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self.frame_slot.put_nowait(frame)
+        except queue.Full:
+            pass
+        FRAMES_READY.set()
+                
+    def take_frame(self):
+        """Return the newest captured frame once, or None if nothing new arrived"""
+        try:
+            return self.frame_slot.get_nowait()
+        except queue.Empty:
+            return None
+        
+    def publish(self, frame, results=None):
+        """Annotate a captured frame with its detection results and store it"""
+        # The raw feed shares this array, so only annotate a copy while someone is watching it
+        if self.raw_viewers:
+            frame = frame.copy()
+        processed_frame, detections, analytics_result = self.processor.process_frame(frame, results)
+        processed_frame.flags.writeable = False  # Shared by reference with every reader from here on
+        
+        with self.frame_ready:
+            self.processed_frame = processed_frame
+            self.frame_versions[True] += 1
+            self.frame_ready.notify_all()
+            
+        # Replaced whole so the broadcaster never sees a half-updated status
+        self.last_status = {
+            'detections': analytics_result['count'],
+            'fps': self.fps,
+            'timestamp': analytics_result['timestamp']
+        }
+        
     def get_frame(self, processed=True):
-        """Get current frame"""
+        """
+        Get current frame. Processed frames are read-only and returned by reference;
+        raw frames are copied since they may still be annotated in place.
+        """
         with self.frame_lock:
             if processed and self.processed_frame is not None:
-                return self.processed_frame.copy()
+                return self.processed_frame
             elif self.current_frame is not None:
                 return self.current_frame.copy()
         return None
         
+    def get_jpeg(self, processed=True, after=0, timeout=1.0):
+        """
+        Wait up to `timeout` for a frame newer than version `after` and return
+        (jpeg_bytes, version). Each frame is encoded once for all viewers.
+        """
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: self.frame_versions[processed] > after, timeout)
+            version = self.frame_versions[processed]
+            frame = self.processed_frame if processed else self.current_frame
+        if version <= after or frame is None:
+            return None, after
+            
+        with self.encode_lock:
+            cached_version, jpeg = self.jpeg_cache[processed]
+            if cached_version < version:
+                jpeg = encode_jpeg(frame, JPEG_QUALITY)
+                if jpeg is None:
+                    return None, version
+                self.jpeg_cache[processed] = (version, jpeg)
+        return jpeg, version
+        
+    def get_mjpeg_part(self, processed=True, after=0, timeout=1.0):
+        """Like get_jpeg(), but returns the whole multipart chunk, framed once per frame for all viewers"""
+        jpeg, version = self.get_jpeg(processed, after, timeout)
+        if jpeg is None:
+            return None, version
+        with self.encode_lock:
+            cached_version, part = self.part_cache[processed]
+            if cached_version < version:
+                part = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+                self.part_cache[processed] = (version, part)
+        return part, version
+        
     def stop(self):
         """Stop streaming"""
         self.running = False
+        if self.process is not None:
+            self._stop_capture_process()
         if self.cap:
             self.cap.release()
 
+# ─── BATCHED INFERENCE ─────────────────────────────────────────────────────────
+class BatchInferenceWorker:
+    """Run one batched YOLO call over the newest frame from every camera"""
+    
+    def __init__(self, interval: float = BATCH_INTERVAL):
+        self.interval = interval
+        self.managers = []
+        self.running = False
+        self.thread = None
+        # Inference inputs are resized straight into this batch, grown as cameras are added
+        self._batch = np.empty((0, INFER_SIZE[1], INFER_SIZE[0], 3), dtype=np.uint8)
+        
+    def add(self, manager):
+        """Include a stream manager's frames in future batches"""
+        self.managers.append(manager)
+        
+    def start(self):
+        """Start the inference loop"""
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        
+    def stop(self):
+        """Stop the inference loop"""
+        self.running = False
+        
+    def _loop(self):
+        """Gather new frames, detect the ones that are due in one call, fan results back out per camera"""
+        pin_to_cores(inference_cores())
+        while self.running:
+            # Sleep until a camera has a new frame instead of polling
+            if not FRAMES_READY.wait(1.0):
+                continue
+            FRAMES_READY.clear()
+            started = time.monotonic()
+            batch = [(manager, manager.take_frame()) for manager in self.managers]
+            batch = [(manager, frame) for manager, frame in batch if frame is not None]
+            
+            if batch:
+                # Cameras not due a detection get None and propagate their tracks instead
+                results = [None] * len(batch)
+                due = [i for i, (manager, _) in enumerate(batch) if manager.processor.detect_due()]
+                if model is not None and due:
+                    try:
+                        # Detection only; each camera's FrameProcessor does its own tracking
+                        # Downscale ourselves with INTER_AREA so the predictor has no letterbox work
+                        if len(self._batch) < len(due):
+                            self._batch = np.empty((len(self.managers),) + self._batch.shape[1:], dtype=np.uint8)
+                        small = self._batch[:len(due)]
+                        for j, i in enumerate(due):
+                            cv2.resize(batch[i][1], INFER_SIZE, dst=small[j], interpolation=cv2.INTER_AREA)
+                        detected = model.predict(
+                            source=frames_to_tensor(small) if GPU_PREPROCESS else list(small),
+                            conf=MIN_CONFIDENCE,
+                            imgsz=INFER_SIZE[::-1],
+                            half=True,
+                            verbose=False
+                        )
+                        for i, camera_results in zip(due, detected):
+                            results[i] = camera_results
+                    except Exception as e:
+                        print(f"Batched detection error: {e}")
+                        
+                for (manager, frame), camera_results in zip(batch, results):
+                    manager.publish(frame, camera_results)
+                NEW_STATS_EVENT.set()
+                
+            # Keep to the configured rate so frames from several cameras batch together
+            elapsed = time.monotonic() - started
+            if elapsed < self.interval:
+                time.sleep(self.interval - elapsed)
+
 # ─── VIDEO STREAMING ───────────────────────────────────────────────────────────
 def generate_frames(camera_id, processed=True):
     """Generate frames for video streaming"""
@@ -270,17 +623,20 @@ def generate_frames(camera_id, processed=True):
     if not manager:
         return
         
-    while True:
-        frame = manager.get_frame(processed=processed)
-        if frame is not None:
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if ret:
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        else:
-            time.sleep(0.1)
+    if not processed:
+        with manager.frame_lock:
+            manager.raw_viewers += 1
+    try:
+        version = 0
+        while True:
+            # Blocks until the next frame; encoding and framing are shared with other viewers
+            part, version = manager.get_mjpeg_part(processed, version)
+            if part is not None:
+                yield part
+    finally:
+        if not processed:
+            with manager.frame_lock:
+                manager.raw_viewers -= 1
 
 # ─── FLASK ROUTES ──────────────────────────────────────────────────────────────
 @app.route('/')
@@ -332,6 +688,30 @@ def generate_report():
     """Generate comprehensive analytics report"""
     return jsonify(analytics.generate_report())
 
+@app.route('/api/export/csv')
+def export_csv():
+    """Stream detections or alerts between two dates as CSV"""
+    data_type = request.args.get('data_type', 'detections')
+    try:
+        chunks = analytics.export_rows(data_type, request.args.get('start_date'),
+                                       request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(next(chunks))
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        yield buf.getvalue()
+        
+    return Response(generate(), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename=bisonguard_{data_type}.csv'})
+
 @app.route('/api/camera/<camera_id>/snapshot')
 def get_snapshot(camera_id):
     """Get current snapshot from camera"""
@@ -340,9 +720,9 @@ def get_snapshot(camera_id):
         frame = manager.get_frame(processed=True)
         if frame is not None:
             # Convert to JPEG
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if ret:
-                io_buf = io.BytesIO(buffer)
+            jpeg = encode_jpeg(frame, quality=95)
+            if jpeg is not None:
+                io_buf = io.BytesIO(jpeg)
                 return send_file(io_buf, mimetype='image/jpeg')
     return "Camera not found", 404
 
@@ -388,47 +768,81 @@ def handle_set_threshold(data):
 
 # ─── BACKGROUND TASKS ──────────────────────────────────────────────────────────
 def analytics_broadcaster():
-    """Broadcast analytics updates to all clients"""
+    """Broadcast combined camera stats as frames are processed (at most 4 Hz) and analytics every 2 s"""
+    next_update = time.monotonic() + ANALYTICS_INTERVAL
     while True:
-        time.sleep(2)
-        stats = analytics.get_statistics()
-        socketio.emit('analytics_update', stats)
-        
-        # Check for alerts
-        for camera_id in CAMERAS.keys():
-            detections = analytics.current_detections.get(camera_id, [])
-            if detections:
-                socketio.emit('detection_event', {
-                    'camera_id': camera_id,
-                    'count': len(detections),
-                    'timestamp': datetime.now().isoformat()
-                })
+        # Wake on newly processed frames, or for the periodic analytics update when idle
+        if NEW_STATS_EVENT.wait(max(0.0, next_update - time.monotonic())):
+            NEW_STATS_EVENT.clear()
+            
+            # One message for every camera's latest frame stats
+            frame_stats = {
+                camera_id: manager.last_status
+                for camera_id, manager in list(stream_managers.items())
+                if manager.last_status is not None
+            }
+            if frame_stats:
+                socketio.emit('frame_stats', frame_stats)
+                
+        if time.monotonic() >= next_update:
+            next_update = time.monotonic() + ANALYTICS_INTERVAL
+            emit_analytics_update()
+            
+        # Rate limit frame_stats
+        socketio.sleep(STATS_INTERVAL)
+
+def emit_analytics_update():
+    """Send full analytics and per-camera detection events to all clients"""
+    stats = analytics.get_statistics()
+    socketio.emit('analytics_update', stats)
+    
+    # Check for alerts
+    for camera_id in CAMERAS.keys():
+        count = analytics.current_counts.get(camera_id, 0)
+        if count:
+            socketio.emit('detection_event', {
+                'camera_id': camera_id,
+                'count': count,
+                'timestamp': datetime.now().isoformat()
+            })
 
 def hourly_aggregator():
     """Aggregate hourly statistics"""
     while True:
-        time.sleep(3600)  # Run every hour
-        # This would aggregate and store hourly stats
+        socketio.sleep(3600)  # Run every hour
         print("Running hourly aggregation...")
+        try:
+            rolled = analytics.rollup_completed_hours()
+            print(f"✓ Aggregated {rolled} hour(s) into hourly_stats")
+        except Exception as e:
+            print(f"Hourly aggregation error: {e}")
 
 # ─── INITIALIZATION ────────────────────────────────────────────────────────────
 def initialize_system():
     """Initialize all system components"""
+    global inference_worker
     print("Initializing BisonGuard Enhanced Dashboard...")
     
+    # One model instance serves every camera
+    load_model(batch=sum(1 for config in CAMERAS.values() if config['enabled']))
+    inference_worker = BatchInferenceWorker()
+    
     # Start camera streams
     for camera_id, config in CAMERAS.items():
         if config['enabled']:
             manager = EnhancedStreamManager(camera_id, config)
             if manager.start():
                 stream_managers[camera_id] = manager
+                inference_worker.add(manager)
                 print(f"✓ Camera {camera_id} initialized")
             else:
                 print(f"✗ Failed to initialize {camera_id}")
                 
+    inference_worker.start()
+                
     # Start background tasks
-    threading.Thread(target=analytics_broadcaster, daemon=True).start()
-    threading.Thread(target=hourly_aggregator, daemon=True).start()
+    socketio.start_background_task(analytics_broadcaster)
+    socketio.start_background_task(hourly_aggregator)
     
     print("System initialization complete!")
 
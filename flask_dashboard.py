@@ -7,11 +7,9 @@ Integrates with existing YOLO model and RTSP streams for comprehensive analytics
 import os
 import json
 import time
-import threading
 import queue
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import deque
-import cv2
 import numpy as np
 from flask import Flask, render_template, Response, jsonify, request
 from flask_socketio import SocketIO, emit
@@ -20,6 +18,7 @@ from ultralytics import YOLO
 
 # Import your existing modules
 from rtsp_bison_tracker_2 import StreamManager, HLSManager
+from json_provider import ORJSON_AVAILABLE, ORJSONProvider
 
 # ─── CONFIGURATION ─────────────────────────────────────────────────────────────
 app = Flask(__name__)
@@ -27,6 +26,9 @@ app.config['SECRET_KEY'] = 'bisonguard-secret-key-change-in-production'
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+if ORJSON_AVAILABLE:
+    app.json = ORJSONProvider(app)
+
 # Camera configuration - can be expanded for multiple cameras
 CAMERAS = {
     'camera_1': {
@@ -46,7 +48,6 @@ stream_managers = {}
 analytics_data = {
     'total_detections': 0,
     'active_tracks': {},
-    'historical_counts': deque(maxlen=1000),  # Keep last 1000 data points
     'alerts': deque(maxlen=50),
     'camera_status': {},
     'peak_count': 0,
@@ -57,22 +58,55 @@ analytics_data = {
 class AnalyticsEngine:
     """Processes detection data and generates insights"""
     
+    HISTORY_SIZE = 1000  # Keep last 1000 data points
+    
     def __init__(self):
         self.movement_patterns = {}
         self.confidence_history = deque(maxlen=100)
         self.detection_zones = {}  # For heatmap generation
         
+        # Historical counts as a ring buffer of parallel arrays (11 bytes per point)
+        self._hist_ts = np.zeros(self.HISTORY_SIZE, dtype=np.int64)   # ms since epoch, 0 = unused
+        self._hist_cnt = np.zeros(self.HISTORY_SIZE, dtype=np.uint16)
+        self._hist_cam = np.zeros(self.HISTORY_SIZE, dtype=np.uint8)  # index into self._camera_ids
+        self._hist_head = 0  # Total points written; next slot is head % HISTORY_SIZE
+        self._camera_ids = list(CAMERAS)
+        self._camera_index = {camera_id: i for i, camera_id in enumerate(self._camera_ids)}
+        
+    def _record_count(self, camera_id, count, timestamp):
+        """Append one point to the historical ring buffer"""
+        cam = self._camera_index.get(camera_id)
+        if cam is None:
+            cam = self._camera_index[camera_id] = len(self._camera_ids)
+            self._camera_ids.append(camera_id)
+        slot = self._hist_head % self.HISTORY_SIZE
+        self._hist_ts[slot] = int(timestamp.timestamp() * 1000)
+        self._hist_cnt[slot] = min(count, 65535)
+        self._hist_cam[slot] = cam
+        self._hist_head += 1
+        
+    def get_history(self, limit=100):
+        """Return the most recent `limit` points, oldest first"""
+        n = min(limit, self._hist_head, self.HISTORY_SIZE)
+        slots = np.arange(self._hist_head - n, self._hist_head) % self.HISTORY_SIZE
+        return [
+            {
+                'timestamp': datetime.fromtimestamp(ts / 1000).isoformat(),
+                'camera_id': self._camera_ids[cam],
+                'count': count
+            }
+            for ts, cam, count in zip(self._hist_ts[slots].tolist(),
+                                      self._hist_cam[slots].tolist(),
+                                      self._hist_cnt[slots].tolist())
+        ]
+        
     def process_detection(self, camera_id, detections):
         """Process new detections and update analytics"""
         timestamp = datetime.now()
         
         # Update detection count
         count = len(detections) if detections else 0
-        analytics_data['historical_counts'].append({
-            'timestamp': timestamp.isoformat(),
-            'camera_id': camera_id,
-            'count': count
-        })
+        self._record_count(camera_id, count, timestamp)
         
         # Check for peak count
         if count > analytics_data['peak_count']:
@@ -111,22 +145,18 @@ class AnalyticsEngine:
         
     def get_statistics(self):
         """Generate comprehensive statistics"""
-        now = datetime.now()
-        hour_ago = now - timedelta(hours=1)
+        hour_ago_ms = int(time.time() * 1000) - 3_600_000
         
-        # Calculate hourly statistics
-        recent_counts = [
-            d['count'] for d in analytics_data['historical_counts']
-            if datetime.fromisoformat(d['timestamp']) > hour_ago
-        ]
+        # Calculate hourly statistics over the ring buffer (unused slots have ts 0)
+        recent_counts = self._hist_cnt[self._hist_ts > hour_ago_ms]
         
         stats = {
             'total_detections': analytics_data['total_detections'],
             'current_active_tracks': len(analytics_data['active_tracks']),
             'peak_count_today': analytics_data['peak_count'],
             'peak_time': analytics_data['peak_time'],
-            'hourly_average': np.mean(recent_counts) if recent_counts else 0,
-            'hourly_max': max(recent_counts) if recent_counts else 0,
+            'hourly_average': float(recent_counts.mean()) if recent_counts.size else 0,
+            'hourly_max': int(recent_counts.max()) if recent_counts.size else 0,
             'cameras_online': sum(1 for s in analytics_data['camera_status'].values() if s == 'online'),
             'total_cameras': len(CAMERAS),
             'recent_alerts': list(analytics_data['alerts'])[-5:]  # Last 5 alerts
@@ -157,17 +187,13 @@ def generate_frames(camera_id):
     if not manager:
         return
         
+    version = 0
     while True:
-        frame = manager.get_current_frame()
-        if frame is not None:
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if ret:
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        else:
-            time.sleep(0.1)
+        # Blocks until the next frame; encoding is shared with other viewers
+        frame_bytes, version = manager.get_jpeg(version)
+        if frame_bytes is not None:
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
 # ─── FLASK ROUTES ──────────────────────────────────────────────────────────────
 @app.route('/')
@@ -200,8 +226,7 @@ def get_camera_stats(camera_id):
 def get_historical_data():
     """Get historical detection data"""
     limit = request.args.get('limit', 100, type=int)
-    data = list(analytics_data['historical_counts'])[-limit:]
-    return jsonify(data)
+    return jsonify(analytics_engine.get_history(max(limit, 0)))
 
 @app.route('/api/alerts')
 def get_alerts():
@@ -243,7 +268,7 @@ def handle_stats_request():
 def stats_broadcaster():
     """Broadcast statistics to all connected clients periodically"""
     while True:
-        time.sleep(2)  # Update every 2 seconds
+        socketio.sleep(2)  # Update every 2 seconds
         stats = analytics_engine.get_statistics()
         socketio.emit('stats_update', stats)
 
@@ -255,7 +280,7 @@ def detection_processor():
                 # Simulate detection processing (integrate with your actual detection data)
                 detections = []  # This would come from your YOLO processing
                 analytics_engine.process_detection(camera_id, detections)
-        time.sleep(1)
+        socketio.sleep(1)
 
 # ─── MAIN EXECUTION ────────────────────────────────────────────────────────────
 if __name__ == '__main__':
@@ -269,8 +294,8 @@ if __name__ == '__main__':
     
     # Start background tasks
     print("\nStarting background tasks...")
-    threading.Thread(target=stats_broadcaster, daemon=True).start()
-    threading.Thread(target=detection_processor, daemon=True).start()
+    socketio.start_background_task(stats_broadcaster)
+    socketio.start_background_task(detection_processor)
     
     # Start Flask app with SocketIO
     print(f"\nStarting dashboard server on http://localhost:5000")
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Shared Flask JSON provider for the BisonGuard dashboards
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+# Faster JSON for the API responses (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify() and request.get_json() through orjson, which also serializes numpy values"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+        
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
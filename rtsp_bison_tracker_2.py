@@ -2,10 +2,20 @@
 # -*- coding: utf-8 -*-
 
 import os
+
+# Size the OpenMP/BLAS pools before cv2, numpy and torch start them. With 4+ cores, capture
+# and HLS get 3 of them (see PIN_CORES) and inference's pools get the rest.
+_n_cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+if _n_cores >= 4:
+    os.environ.setdefault("OMP_NUM_THREADS", str(_n_cores - 3))
+
 import time
+import atexit
 import cv2
+import gzip
 import json
 import math
+import hashlib
 import queue
 import shutil
 import signal
@@ -13,37 +23,405 @@ import threading
 import subprocess
 import tempfile
 import webbrowser
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
 import sys
 
 try:
+    import torch
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
 except ImportError:
     YOLO_AVAILABLE = False
     print("Warning: ultralytics not available. Running in stream-only mode.")
 
+# libjpeg-turbo for faster MJPEG encoding (optional)
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    TJ = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError, RuntimeError):
+    TURBOJPEG_AVAILABLE = False
+
 # ─── PARAMETERS ────────────────────────────────────────────────────────────────
 DEFAULT_RTSP_URL = "rtsps://cr-14.hostedcloudvideo.com:443/publish-cr/_definst_/XQYKDKIHA6RIQKST9PIKRE77D77547OU9D091HNA/6b55ae911a8dbd2bd7d3a75ae4547acc976d0b9e?action=PLAY"
 TRACKER_CFG = "args.yaml"
 MODEL_WEIGHTS = "best.pt"
+EXPORT_MODEL = True          # Export MODEL_WEIGHTS once to TensorRT (GPU) or OpenVINO (CPU) and load that
+ENGINE_DIR = "engines"       # TensorRT engines, one per weights file, GPU model and precision
+INT8_CALIBRATION = None      # Dataset YAML of representative bison frames; enables INT8 TensorRT
 CLASS_NAMES = ["bison"]
+BISON_CLS_IDX = CLASS_NAMES.index("bison")
 MIN_CONFIDENCE = 0.3
+VID_STRIDE = 1               # Process every Nth camera frame; skipped ones are grabbed but not converted
+INFER_SIZE = (640, 384)      # (width, height) frames are resized to for YOLO; boxes are scaled back
+MOTION_THRESHOLD = 3.0       # Mean gray-level change (64x64 thumbnail) below which detections are reused
+MOTION_REFRESH = 10          # Run the model at least every this many batches, even on a still scene
 HTTP_PORT = 8080
+PIN_CORES = True             # Give capture, HLS and inference their own cores (Linux, 4+ cores)
+OPENCV_THREADS = 2           # OpenCV's internal pool, kept small so it doesn't fight PyTorch
+USE_OPENCL = False           # Resize inference inputs through OpenCL (e.g. an iGPU) to spare CPU cores;
+                             # each frame is uploaded in full, so measure before enabling
+MAX_HTTP_CLIENTS = 64        # Concurrent connections; extra ones are closed straight away
+HTTP_SEND_TIMEOUT = 10       # seconds a stalled client may block a send before it is dropped
 MJPEG_QUALITY = 85
+MJPEG_WIDTH = 960            # MJPEG frames wider than this are downscaled before encoding (0 = never)
 HLS_SEGMENT_TIME = 2         # seconds
 HLS_LIST_SIZE = 6            # rolling window size
 HLS_DELETE_OLD = True
+HLS_PASSTHROUGH = False      # Remux the camera's H.264 to HLS in the capture ffmpeg (no overlays on HLS)
+RECONNECT_MAX_DELAY = 5.0    # seconds; reconnect backoff doubles from 50 ms up to this
+HLS_QUEUE_SIZE = 2           # Frames waiting for ffmpeg before new ones are dropped
+MODEL_BATCH = 2              # Max frames per YOLO call; batches only fill while frames are queued up
+READ_PREFETCH = 2            # Decoded frames queued between the reader and compute threads
+# Capture ring: being read, prefetched, batched, latest, HLS queued + being written
+FRAME_SLOTS = READ_PREFETCH + MODEL_BATCH + HLS_QUEUE_SIZE + 3
+FFMPEG_CAPTURE = True       # Decode RTSP in an ffmpeg subprocess when GStreamer is unavailable
+GST_DECODERS = ("nvh264dec", "nvv4l2decoder", "vaapih264dec", "avdec_h264")  # Tried in order
 # ──────────────────────────────────────────────────────────────────────────────
 
 
+OPENCL_RESIZE = USE_OPENCL and cv2.ocl.haveOpenCL()
+
+
+def resize_for_inference(frame, dst):
+    """Downscale a frame to INFER_SIZE into dst, on the OpenCL device when OPENCL_RESIZE is set."""
+    if OPENCL_RESIZE:
+        small = cv2.resize(cv2.UMat(frame), INFER_SIZE, interpolation=cv2.INTER_AREA)
+        return small.get()
+    return cv2.resize(frame, INFER_SIZE, dst=dst, interpolation=cv2.INTER_AREA)
+
+
+def label_metrics(no_id_label: str, id_label: str, scale: float = 0.6, thickness: int = 2):
+    """
+    Measure box labels once: (no-id width, height, id width without digits, width per digit).
+    Hershey digits are fixed-width, so a label's size depends only on how many digits its
+    track id has; `id_label` is the id label with the digits left out.
+    """
+    def size(text):
+        return cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)[0]
+    (no_id_width, height), (id_width, _) = size(no_id_label), size(id_label)
+    return no_id_width, height, id_width, size("00")[0] - size("0")[0]
+
+
+LABEL_NO_ID_WIDTH, LABEL_HEIGHT, LABEL_ID_WIDTH, LABEL_DIGIT_WIDTH = label_metrics("Bison (0.000)", "ID  (0.000)")
+
+
+# ─── CORE PINNING ─────────────────────────────────────────────────────────────
+# With 4+ cores: capture decoding on the first two, the HLS writer and encoder on
+# the third, and the stream loop (inference, drawing) plus its thread pools on the rest.
+ALLOWED_CORES = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+if PIN_CORES and len(ALLOWED_CORES) >= 4:
+    CAPTURE_CORES, HLS_CORES, MODEL_CORES = ALLOWED_CORES[:2], ALLOWED_CORES[2:3], ALLOWED_CORES[3:]
+else:
+    CAPTURE_CORES = HLS_CORES = MODEL_CORES = []
+
+
+def pin_to_cores(cores, pid: int = 0):
+    """Restrict a process, or the calling thread when pid is 0, to cores (Linux only)."""
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(pid, cores)
+        except OSError as e:
+            print(f"Could not pin to cores {cores}: {e}")
+
+
 # ─── UTILITIES ────────────────────────────────────────────────────────────────
 def which(cmd: str) -> bool:
     """Return True if executable is on PATH."""
     return shutil.which(cmd) is not None
 
 
+def read_sampled(cap, stride: int = 1, image=None):
+    """
+    Skip stride - 1 frames with grab() (no conversion to BGR or copy into
+    Python) and read the next one, into `image` when it fits.
+    """
+    for _ in range(stride - 1):
+        if not cap.grab():
+            return False, None
+    return cap.read(image)
+
+
+def optimized_weights(weights: str = MODEL_WEIGHTS) -> str:
+    """
+    Return the path of an exported copy of `weights`, exporting it on first
+    use: a TensorRT engine under ENGINE_DIR when CUDA is available (INT8 when
+    INT8_CALIBRATION is set, else FP16), otherwise an OpenVINO model next to
+    the weights if openvino is installed. Falls back to `weights`.
+    """
+    base = os.path.splitext(weights)[0]
+    if torch.cuda.is_available():
+        # Engines are specific to the GPU they were built on
+        int8 = bool(INT8_CALIBRATION)
+        gpu = "".join(c if c.isalnum() else "_" for c in torch.cuda.get_device_name(0))
+        path = os.path.join(ENGINE_DIR, f"{os.path.basename(base)}-{gpu}-{'int8' if int8 else 'fp16'}.engine")
+        fmt, kwargs = "engine", {"half": not int8, "int8": int8, "dynamic": True, "batch": MODEL_BATCH,
+                                 "imgsz": INFER_SIZE[::-1]}
+        if int8:
+            kwargs["data"] = INT8_CALIBRATION
+    else:
+        try:
+            import openvino  # noqa: F401  (only needed by the export)
+        except ImportError:
+            return weights
+        fmt, path, kwargs = "openvino", base + "_openvino_model", {"dynamic": True}
+
+    if not os.path.exists(path):
+        print(f"Exporting {weights} to {fmt} (one-time, may take several minutes)...")
+        try:
+            exported = YOLO(weights).export(format=fmt, verbose=False, **kwargs)
+            if fmt == "engine":
+                os.makedirs(ENGINE_DIR, exist_ok=True)
+                shutil.move(exported, path)
+            else:
+                path = exported or path
+        except Exception as e:
+            print(f"Export to {fmt} failed, using {weights}: {e}")
+            return weights
+    return path
+
+
+def encode_jpeg(frame, quality: int = MJPEG_QUALITY):
+    """Encode a BGR frame as JPEG bytes (libjpeg-turbo when available), or None."""
+    if TURBOJPEG_AVAILABLE:
+        return TJ.encode(frame, quality=quality, pixel_format=TJPF_BGR)
+    ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                           cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+    return buf.tobytes() if ok else None
+
+
+_gst_decoder = None  # Decoder element that last opened successfully
+
+
+def gstreamer_available() -> bool:
+    """Return True if this OpenCV build includes the GStreamer backend."""
+    for line in cv2.getBuildInformation().splitlines():
+        if line.strip().startswith("GStreamer:"):
+            return "YES" in line
+    return False
+
+
+def gst_pipeline(url: str, decoder: str) -> str:
+    """Build a low-latency GStreamer pipeline that decodes H.264 RTSP to BGR frames."""
+    return (
+        f"rtspsrc location={url} latency=50 protocols=tcp ! rtph264depay ! h264parse ! "
+        f"{decoder} ! videoconvert ! video/x-raw,format=BGR ! "
+        "appsink drop=true max-buffers=1 sync=false"
+    )
+
+
+_ffmpeg_lists = {}  # ffmpeg -hwaccels / -decoders output, listed once per flag
+
+
+def _ffmpeg_list(flag: str) -> set:
+    """Words printed by `ffmpeg -hide_banner <flag>`, or an empty set if ffmpeg can't run."""
+    if flag not in _ffmpeg_lists:
+        try:
+            out = subprocess.run(["ffmpeg", "-hide_banner", flag],
+                                 capture_output=True, text=True, timeout=10).stdout
+            _ffmpeg_lists[flag] = set(out.split())
+        except (OSError, subprocess.SubprocessError):
+            _ffmpeg_lists[flag] = set()
+    return _ffmpeg_lists[flag]
+
+
+def ffmpeg_has_cuda() -> bool:
+    """Return True if the installed ffmpeg supports -hwaccel cuda."""
+    return "cuda" in _ffmpeg_list("-hwaccels")
+
+
+def ffmpeg_cuvid_decoder(codec: str):
+    """Name of ffmpeg's NVDEC (cuvid) decoder for `codec`, e.g. h264_cuvid, or None."""
+    name = f"{codec}_cuvid"
+    return name if codec and name in _ffmpeg_list("-decoders") else None
+
+
+def ffmpeg_has_encoder(name: str) -> bool:
+    """Return True if the installed ffmpeg lists encoder `name` (e.g. h264_nvenc)."""
+    return name in _ffmpeg_list("-encoders")
+
+
+def probe_stream(url: str):
+    """Return (width, height, fps, codec) of the first video stream via ffprobe, or (0, 0, 0.0, "")."""
+    if not which("ffprobe"):
+        return 0, 0, 0.0, ""
+    cmd = ["ffprobe", "-v", "error"]
+    if url.startswith(("rtsp://", "rtsps://")):
+        cmd += ["-rtsp_transport", "tcp"]
+    cmd += ["-select_streams", "v:0", "-show_entries", "stream=codec_name,width,height,avg_frame_rate",
+            "-of", "default=noprint_wrappers=1", url]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=15).stdout
+        info = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+        num, _, den = info.get("avg_frame_rate", "0/0").partition("/")
+        fps = float(num) / float(den) if den and float(den) else 0.0
+        return int(info["width"]), int(info["height"]), fps, info.get("codec_name", "")
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError):
+        return 0, 0, 0.0, ""
+
+
+class FFmpegCapture:
+    """
+    Minimal cv2.VideoCapture stand-in that decodes in an ffmpeg subprocess
+    (on NVDEC via cuvid or -hwaccel cuda when available) and reads raw BGR frames
+    from its stdout, so decoding never runs on a Python thread. `extra_output`
+    adds a second output (e.g. an HLS remux) to the same ffmpeg process.
+    """
+    def __init__(self, url: str, extra_output=None):
+        self.proc = None
+        self._scratch = None  # Destination for grab()bed frames
+        self.width, self.height, self.fps, codec = probe_stream(url)
+        if not (self.width and self.height) or not which("ffmpeg"):
+            return
+
+        cmd = ["ffmpeg", "-loglevel", "error", "-nostdin"]
+        if url.startswith(("rtsp://", "rtsps://")):
+            cmd += ["-rtsp_transport", "tcp"]
+        cmd += ["-fflags", "nobuffer", "-flags", "low_delay"]
+        if ffmpeg_has_cuda():
+            # Decode entirely on NVDEC (cuvid) when ffmpeg has a decoder for this codec
+            cuvid = ffmpeg_cuvid_decoder(codec)
+            cmd += ["-c:v", cuvid] if cuvid else ["-hwaccel", "cuda"]
+        cmd += ["-i", url]
+        if extra_output:
+            cmd += extra_output
+        cmd += ["-map", "0:v:0", "-f", "rawvideo", "-pix_fmt", "bgr24", "-an", "-"]
+        try:
+            self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                         bufsize=10**7)
+        except OSError as e:
+            print(f"Failed to start ffmpeg capture: {e}")
+
+    def isOpened(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def grab(self) -> bool:
+        """Consume the next frame without handing it out."""
+        ok, self._scratch = self.read(self._scratch)
+        return ok
+
+    def read(self, image=None):
+        """Read the next frame, into `image` when it is a matching contiguous BGR array."""
+        if self.proc is None:
+            return False, None
+        shape = (self.height, self.width, 3)
+        if image is None or image.shape != shape or image.dtype != np.uint8 or not image.flags.c_contiguous:
+            image = np.empty(shape, dtype=np.uint8)
+
+        view = memoryview(image).cast("B")
+        got = 0
+        while got < len(view):
+            n = self.proc.stdout.readinto(view[got:])
+            if not n:
+                return False, None
+            got += n
+        return True, image
+
+    def get(self, prop_id: int) -> float:
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: float(self.width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.height),
+            cv2.CAP_PROP_FPS: float(self.fps),
+        }.get(prop_id, 0.0)
+
+    def set(self, prop_id: int, value) -> bool:
+        return False
+
+    def release(self):
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.stdout.close()
+            self.proc.wait()
+            self.proc = None
+
+
+def open_capture(url: str):
+    """
+    Open a stream, decoding H.264 on the GPU/VPU via GStreamer when available
+    (NVDEC, then VA-API, then software avdec_h264), then in an ffmpeg
+    subprocess, and finally falling back to OpenCV's FFmpeg backend.
+    """
+    global _gst_decoder
+    if url.startswith(("rtsp://", "rtsps://")) and gstreamer_available():
+        decoders = (_gst_decoder,) if _gst_decoder else GST_DECODERS
+        for decoder in decoders:
+            cap = cv2.VideoCapture(gst_pipeline(url, decoder), cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                _gst_decoder = decoder
+                return cap
+            cap.release()
+
+    if FFMPEG_CAPTURE and url.startswith(("rtsp://", "rtsps://")) and which("ffmpeg"):
+        cap = FFmpegCapture(url)
+        if cap.isOpened():
+            return cap
+        cap.release()
+
+    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment owned by another process without taking over its cleanup."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def camera_worker(url: str, counter, frame_event, meta_conn, stop_event):
+    """
+    Capture process: decode `url` into a two-slot shared-memory ring.
+
+    The segment's (name, shape) is sent over meta_conn whenever it is created
+    (first frame, resolution change), or None if the stream cannot be opened.
+    `counter` is bumped after each frame is written to slot counter % 2 and
+    frame_event is set, so readers can wait without polling.
+    """
+    cap = open_capture(url)
+    if not cap.isOpened():
+        meta_conn.send(None)
+        return
+
+    shm = slots = None
+    try:
+        while not stop_event.is_set():
+            # Decode straight into the slot readers are not using
+            target = slots[(counter.value + 1) % 2] if slots is not None else None
+            ret, frame = cap.read(target)
+            if not ret:
+                cap.release()
+                time.sleep(2)
+                cap = open_capture(url)
+                continue
+
+            if slots is None or frame.shape != slots.shape[1:]:
+                # New segment sized for this resolution; views must go before close()
+                target = slots = None
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+                shm = shared_memory.SharedMemory(create=True, size=2 * frame.nbytes)
+                slots = np.ndarray((2, *frame.shape), dtype=np.uint8, buffer=shm.buf)
+                meta_conn.send((shm.name, frame.shape))
+                slots[(counter.value + 1) % 2] = frame
+
+            counter.value += 1
+            frame_event.set()
+    finally:
+        cap.release()
+        target = slots = frame = None
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
 # ─── HLS MANAGER (FFMPEG PIPELINE) ────────────────────────────────────────────
 class HLSManager:
     """
@@ -59,6 +437,7 @@ class HLSManager:
         self.delete_old = bool(delete_old)
 
         self.enabled = which("ffmpeg")
+        self.passthrough = False  # Segments are written by the capture ffmpeg, not fed from frames
         self.proc = None
         self.tmpdir = None
         self.playlist_name = "index.m3u8"
@@ -66,7 +445,7 @@ class HLSManager:
         self.stdin_lock = threading.Lock()
 
         # frame queue & writer thread (to decouple capture pace from ffmpeg pacing)
-        self.frame_q = queue.Queue(maxsize=60)  # small buffer to avoid memory growth
+        self.frame_q = queue.Queue(maxsize=HLS_QUEUE_SIZE)  # (frame, release) pairs
         self.writer_thread = None
         self.running = False
 
@@ -76,8 +455,9 @@ class HLSManager:
             return False
 
         self.tmpdir = tempfile.mkdtemp(prefix="hls_")
-        playlist_path = os.path.join(self.tmpdir, self.playlist_name)
-        segment_path = os.path.join(self.tmpdir, self.segment_pattern)
+
+        # One keyframe per segment, so every segment closes at exactly hls_time
+        gop = max(1, int(round(self.fps * self.segment_time)))
 
         # Build ffmpeg command
         # Read raw BGR frames from stdin, encode H.264, output HLS.
@@ -85,6 +465,8 @@ class HLSManager:
             "ffmpeg",
             "-hide_banner", "-loglevel", "error",
             "-y",
+            "-fflags", "nobuffer",
+            "-flags", "low_delay",
             "-f", "rawvideo",
             "-pix_fmt", "bgr24",
             "-s:v", f"{self.width}x{self.height}",
@@ -92,16 +474,13 @@ class HLSManager:
             "-i", "-",                     # stdin
             "-an",
             "-c:v", "libx264",
-            "-preset", "veryfast",
+            "-preset", "ultrafast",
             "-tune", "zerolatency",
+            "-g", str(gop),
+            "-keyint_min", str(gop),
+            "-sc_threshold", "0",
             "-pix_fmt", "yuv420p",
-            "-f", "hls",
-            "-hls_time", str(self.segment_time),
-            "-hls_list_size", str(self.list_size),
-            "-hls_flags", "delete_segments+independent_segments" if self.delete_old else "independent_segments",
-            "-hls_segment_filename", segment_path,
-            playlist_path
-        ]
+        ] + self._hls_output()
 
         try:
             self.proc = subprocess.Popen(
@@ -109,12 +488,13 @@ class HLSManager:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
-                bufsize=0
+                bufsize=1024 * 1024
             )
         except Exception as e:
             print(f"Failed to start ffmpeg for HLS: {e}")
             self.enabled = False
             return False
+        pin_to_cores(HLS_CORES, self.proc.pid)
 
         self.running = True
         self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
@@ -122,35 +502,94 @@ class HLSManager:
         print(f"HLS started. Serving from: {self.tmpdir}")
         return True
 
+    def _hls_output(self):
+        """ffmpeg output options that write the playlist and segments into tmpdir."""
+        return [
+            "-f", "hls",
+            "-hls_time", str(self.segment_time),
+            "-hls_list_size", str(self.list_size),
+            "-hls_flags", ("delete_segments+" if self.delete_old else "") + "independent_segments+program_date_time",
+            "-hls_segment_filename", os.path.join(self.tmpdir, self.segment_pattern),
+            os.path.join(self.tmpdir, self.playlist_name)
+        ]
+
+    def start_passthrough(self):
+        """
+        Prepare tmpdir for an HLS remux done by another ffmpeg (see FFmpegCapture)
+        and return that output's options. Frames passed to write_frame are ignored.
+        """
+        if not self.enabled:
+            return None
+        if not self.tmpdir:
+            self.tmpdir = tempfile.mkdtemp(prefix="hls_")
+        self.passthrough = True
+        self.running = True
+        return ["-map", "0:v:0", "-an", "-c:v", "copy"] + self._hls_output()
+
     def _writer_loop(self):
+        pin_to_cores(HLS_CORES)
         while self.running and self.proc and (self.proc.poll() is None):
             try:
-                frame = self.frame_q.get(timeout=0.3)
+                batch = [self.frame_q.get(timeout=0.3)]
             except queue.Empty:
                 continue
+            # Take whatever else is already queued so it goes out in the same call
+            while True:
+                try:
+                    batch.append(self.frame_q.get_nowait())
+                except queue.Empty:
+                    break
 
             try:
-                # Write raw frame bytes (BGR24)
+                # Write raw frame bytes (BGR24) straight from the array buffers
                 with self.stdin_lock:
                     if self.proc and self.proc.stdin and (self.proc.poll() is None):
-                        self.proc.stdin.write(frame.tobytes())
+                        self._write_frames([memoryview(frame).cast("B") for frame, _ in batch])
             except Exception as e:
                 # If ffmpeg died or write failed, stop gracefully
                 print(f"HLS writer error: {e}")
                 break
+            finally:
+                for _, release in batch:
+                    if release:
+                        release()
 
         self._close_proc()
 
-    def write_frame(self, frame):
-        """Queue a frame for HLS. Frame must be (H, W, 3) BGR np.uint8."""
-        if not self.enabled or not self.running:
+    def _write_frames(self, views):
+        """Write frame buffers to ffmpeg's stdin, gathered into writev(2) calls where available."""
+        if not hasattr(os, "writev"):
+            for view in views:
+                self.proc.stdin.write(view)
             return
+        fd = self.proc.stdin.fileno()
+        while views:
+            written = os.writev(fd, views)
+            # Drop fully written buffers and trim a partially written one
+            while views and written >= len(views[0]):
+                written -= len(views.pop(0))
+            if views:
+                views[0] = views[0][written:]
+
+    def write_frame(self, frame, release=None):
+        """
+        Queue a frame for HLS. Frame must be (H, W, 3) BGR np.uint8 and is
+        written by reference; `release` is called once ffmpeg is done with it
+        (or straight away if the frame is dropped).
+        """
+        if not self.enabled or not self.running or self.passthrough:
+            if release:
+                release()
+            return
+        # The writer hands the array buffer to ffmpeg as-is
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
         # Drop if queue is full (avoid blocking capture loop)
         try:
-            self.frame_q.put_nowait(frame)
+            self.frame_q.put_nowait((frame, release))
         except queue.Full:
             # Drop frame silently
-            pass
+            if release:
+                release()
 
     def get_playlist_path(self):
         if self.tmpdir:
@@ -171,9 +610,11 @@ class HLSManager:
         # Drain queue quickly
         while not self.frame_q.empty():
             try:
-                self.frame_q.get_nowait()
+                _, release = self.frame_q.get_nowait()
             except queue.Empty:
                 break
+            if release:
+                release()
         self._close_proc()
         if self.tmpdir and os.path.isdir(self.tmpdir):
             try:
@@ -223,12 +664,33 @@ class StreamManager:
         self.rtsp_url = rtsp_url
         self.apply_model = apply_model
         self.running = False
-        self.current_frame = None
+        self.current_frame = None  # Read-only view of the latest ring slot
         self.frame_lock = threading.Lock()
+        # Capture ring: frames are decoded and drawn in place, then shared with
+        # MJPEG readers and the HLS writer without copying. A slot's semaphore
+        # is held while it is being filled or waits in the HLS queue.
+        self._frame_slots = [None] * FRAME_SLOTS  # Allocated by cap.read() on first use
+        self._slot_locks = [threading.Semaphore(1) for _ in range(FRAME_SLOTS)]
+        self._latest_idx = 0
+        # Downscaled copies of a batch's frames for the model, reused every batch
+        self._infer_bufs = [np.empty((INFER_SIZE[1], INFER_SIZE[0], 3), np.uint8) for _ in range(MODEL_BATCH)]
+        # Motion gating: thumbnail of the last frame the model saw and its result
+        self._motion_ref = None
+        self._last_result = None
+        self._reused_batches = 0
+        self.frame_ready = threading.Condition(self.frame_lock)  # Notified on each new frame
+        self.frame_version = 0
+        self.jpeg_cache = (0, None)  # (version, bytes) shared by all viewers
+        self.encode_lock = threading.Lock()
+        self._mjpeg_scratch = None  # Copy of the latest frame, downscaled, reused by get_jpeg (guarded by encode_lock)
         self.model = None
         self.cap = None
         self.hls = None
+        self._passthrough_active = False  # The open capture is also writing the HLS segments
         self.stream_thread = None
+        self.reader_thread = None
+        # (slot, frame) from the reader to the compute loop; None marks a stream drop
+        self.read_q = queue.Queue(maxsize=READ_PREFETCH)
 
         self.stats = {
             'total_frames': 0,
@@ -240,8 +702,10 @@ class StreamManager:
 
         if apply_model and YOLO_AVAILABLE:
             try:
-                print(f"Loading YOLO model: {MODEL_WEIGHTS}")
-                self.model = YOLO(MODEL_WEIGHTS)
+                weights = optimized_weights() if EXPORT_MODEL else MODEL_WEIGHTS
+                print(f"Loading YOLO model: {weights}")
+                self.model = YOLO(weights, task="detect")
+                self._warmup_model()
                 print("Model loaded successfully")
             except Exception as e:
                 print(f"Failed to load model: {e}")
@@ -250,125 +714,282 @@ class StreamManager:
             print("YOLO not available, running without model")
             self.apply_model = False
 
+    def _warmup_model(self, runs=3):
+        """Run a few dummy batches so CUDA/engine setup isn't paid on the first live frames."""
+        dummy = [np.zeros((INFER_SIZE[1], INFER_SIZE[0], 3), np.uint8)] * MODEL_BATCH
+        for _ in range(runs):
+            self.model.predict(dummy, imgsz=INFER_SIZE[::-1], conf=MIN_CONFIDENCE, verbose=False)
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()  # Don't report ready while warm-up kernels are still queued
+
+    def _open_capture(self):
+        """Open the stream, remuxing it to HLS in the same ffmpeg when passthrough is on."""
+        self._passthrough_active = False
+        if self.hls and self.hls.passthrough:
+            cap = FFmpegCapture(self.rtsp_url, extra_output=self.hls.start_passthrough())
+            if cap.isOpened():
+                pin_to_cores(CAPTURE_CORES, cap.proc.pid)
+                self._passthrough_active = True
+                return cap
+            cap.release()
+            print("HLS passthrough capture failed, falling back to the regular capture")
+        cap = open_capture(self.rtsp_url)
+        if isinstance(cap, FFmpegCapture):
+            pin_to_cores(CAPTURE_CORES, cap.proc.pid)
+        return cap
+
     def start_stream(self):
         print(f"Connecting to RTSP stream: {self.rtsp_url}")
-        self.cap = cv2.VideoCapture(self.rtsp_url)
+        if HLS_PASSTHROUGH and self.rtsp_url.startswith(("rtsp://", "rtsps://")) and which("ffmpeg"):
+            # Geometry is only needed by the re-encoding pipeline
+            self.hls = HLSManager(0, 0, 0, HLS_SEGMENT_TIME, HLS_LIST_SIZE, HLS_DELETE_OLD)
+            self.hls.start_passthrough()
+        self.cap = self._open_capture()
         if not self.cap.isOpened():
             raise RuntimeError(f"Cannot connect to RTSP stream: {self.rtsp_url}")
 
-        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1280
-        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 720
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
-        if not fps or math.isnan(fps) or fps <= 1:
-            fps = 25.0
+        width, height, fps = self._stream_geometry()
 
         print("Stream properties:")
         print(f"  Resolution: {width}x{height}")
         print(f"  FPS: {fps:.1f}")
 
-        # Start HLS manager (if ffmpeg available)
-        self.hls = HLSManager(width, height, fps, HLS_SEGMENT_TIME, HLS_LIST_SIZE, HLS_DELETE_OLD)
-        hls_ok = self.hls.start()
+        # Start HLS manager (if ffmpeg available); encode frames unless the capture is remuxing
+        hls_ok = self._passthrough_active or self._start_encoding_hls()
 
         self.running = True
+        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.reader_thread.start()
         self.stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
         self.stream_thread.start()
 
         return width, height, fps, hls_ok
 
-    def _stream_loop(self):
-        frame_count = 0
-        last_fps_time = time.time()
-        fps_frame_count = 0
+    def _stream_geometry(self):
+        """(width, height, fps) of the open capture, with defaults for values it doesn't report."""
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 1280
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 720
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if not fps or math.isnan(fps) or fps <= 1:
+            fps = 25.0
+        return width, height, fps
+
+    def _start_encoding_hls(self):
+        """Replace any HLS output with an ffmpeg encoder fed by write_frame; returns whether it started."""
+        if self.hls:
+            self.hls.stop()
+        width, height, fps = self._stream_geometry()
+        # HLS is fed the sampled frames only
+        self.hls = HLSManager(width, height, fps / VID_STRIDE, HLS_SEGMENT_TIME, HLS_LIST_SIZE, HLS_DELETE_OLD)
+        return self.hls.start()
+
+    def _reader_loop(self):
+        """Decode frames into ring slots ahead of the compute loop, dropping the oldest when it falls behind."""
+        pin_to_cores(CAPTURE_CORES)
+        reconnect_delay = 0.05
 
         while self.running:
-            ret, frame = self.cap.read()
+            idx = self._acquire_slot()
+            ret, frame = read_sampled(self.cap, VID_STRIDE, self._frame_slots[idx])
             if not ret:
+                self._slot_locks[idx].release()
+                self._enqueue_read(None)
                 print("Failed to read frame, attempting to reconnect...")
                 self.cap.release()
-                time.sleep(1)
-                self.cap = cv2.VideoCapture(self.rtsp_url)
+                time.sleep(reconnect_delay)
+                reconnect_delay = min(reconnect_delay * 2, RECONNECT_MAX_DELAY)
+                self.cap = self._open_capture()
+                if self.hls and self.hls.passthrough and not self._passthrough_active and self.cap.isOpened():
+                    # Passthrough failed on reconnect: nothing else would write segments
+                    self._start_encoding_hls()
                 continue
+            self._frame_slots[idx] = frame  # read() reallocates if the stream size changed
+            reconnect_delay = 0.05
+            self._enqueue_read((idx, frame))
+
+    def _enqueue_read(self, item):
+        """Queue a read result, discarding (and freeing) the oldest frame if the queue is full."""
+        while True:
+            try:
+                self.read_q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    stale = self.read_q.get_nowait()
+                except queue.Empty:
+                    continue
+                if stale is not None:
+                    self._slot_locks[stale[0]].release()
+
+    def _stream_loop(self):
+        # Thread pools started from here (PyTorch, OpenCV) inherit this mask
+        pin_to_cores(MODEL_CORES)
+        frame_count = 0
+        last_fps_ns = time.monotonic_ns()
+        fps_frame_count = 0
+
+        pending = []  # (slot, frame, frame_count) waiting for a full model batch
+
+        while self.running:
+            try:
+                item = self.read_q.get(timeout=0.5)
+            except queue.Empty:
+                item = None
+            if item is None:
+                # Stream dropped or stalled: don't hold a partial batch back
+                self._flush_batch(pending)
+                continue
+            idx, frame = item
 
             frame_count += 1
             fps_frame_count += 1
 
-            # FPS calc
-            now = time.time()
-            if now - last_fps_time >= 1.0:
-                self.stats['fps'] = fps_frame_count / (now - last_fps_time)
+            # FPS calc (monotonic clock, so NTP adjustments can't skew it)
+            elapsed_ns = time.monotonic_ns() - last_fps_ns
+            if elapsed_ns >= 1_000_000_000:
+                self.stats['fps'] = fps_frame_count * 1_000_000_000 / elapsed_ns
                 fps_frame_count = 0
-                last_fps_time = now
+                last_fps_ns += elapsed_ns
 
-            # AI processing (optional)
+            # AI processing (optional), batched to amortise per-call overhead. A batch goes
+            # out as soon as nothing else is queued, so it only grows when we fall behind.
             if self.apply_model and self.model:
-                frame = self._process_frame_with_model(frame, frame_count)
+                pending.append((idx, frame, frame_count))
+                if len(pending) >= MODEL_BATCH or self.read_q.empty():
+                    self._flush_batch(pending)
             else:
                 self._add_basic_overlay(frame, frame_count)
-
-            # Make a copy for MJPEG
-            with self.frame_lock:
-                self.current_frame = frame.copy()
-
-            # Push to HLS if active
-            if self.hls and self.hls.enabled:
-                # Important: HLS expects contiguous frames at roughly constant size/rate
-                # We queue the current BGR frame
-                self.hls.write_frame(frame)
+                self._publish(idx, frame)
 
             self.stats['total_frames'] = frame_count
 
-            # Small chill to avoid tight loop
-            time.sleep(0.001)
+        for idx, _, _ in pending:
+            self._slot_locks[idx].release()
+        while not self.read_q.empty():
+            item = self.read_q.get_nowait()
+            if item is not None:
+                self._slot_locks[item[0]].release()
+
+    def _flush_batch(self, pending):
+        """Run the model over the pending frames in one call, then draw and publish them in order."""
+        if not pending:
+            return
+        thumb = self._thumbnail(pending[-1][1])
+        if (self._last_result is not None and self._reused_batches < MOTION_REFRESH
+                and thumb.shape == self._motion_ref.shape
+                and cv2.absdiff(thumb, self._motion_ref).mean() < MOTION_THRESHOLD):
+            # Still scene: reuse the last detections instead of running the model
+            self._reused_batches += 1
+            for idx, frame, frame_count in pending:
+                self._process_frame_with_model(frame, frame_count, self._last_result)
+                self._publish(idx, frame)
+            pending.clear()
+            return
 
-    def _process_frame_with_model(self, frame, frame_count):
         try:
+            small = [resize_for_inference(frame, buf) for (_, frame, _), buf in zip(pending, self._infer_bufs)]
             results = self.model.track(
-                source=frame,
+                source=small,
+                imgsz=INFER_SIZE[::-1],
                 tracker=TRACKER_CFG if os.path.exists(TRACKER_CFG) else "bytetrack.yaml",
                 conf=MIN_CONFIDENCE,
+                classes=[BISON_CLS_IDX],  # Other classes are dropped in NMS, on the device, before tracking
                 persist=True,
                 verbose=False
-            )[0]
+            )
+            self._motion_ref, self._last_result, self._reused_batches = thumb, results[-1], 0
+        except Exception as e:
+            print(f"Error in model processing: {e}")
+            results = [None] * len(pending)
 
+        for (idx, frame, frame_count), result in zip(pending, results):
+            if result is None:
+                self._add_basic_overlay(frame, frame_count)
+            else:
+                self._process_frame_with_model(frame, frame_count, result)
+            self._publish(idx, frame)
+        pending.clear()
+
+    @staticmethod
+    def _thumbnail(frame):
+        """64x64 grayscale thumbnail used to measure scene motion between batches."""
+        return cv2.cvtColor(cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    def _publish(self, idx, frame):
+        """Make a drawn ring slot the latest frame and hand it to HLS."""
+        # The view stops readers from drawing on the slot
+        view = frame.view()
+        view.flags.writeable = False
+        with self.frame_ready:
+            self._latest_idx = idx
+            self.current_frame = view
+            self.frame_version += 1
+            self.frame_ready.notify_all()
+
+        # Push to HLS if active
+        if self.hls and self.hls.enabled:
+            # Important: HLS expects contiguous frames at roughly constant size/rate
+            # The slot stays reserved until ffmpeg has been fed the frame
+            self.hls.write_frame(frame, release=self._slot_locks[idx].release)
+        else:
+            self._slot_locks[idx].release()
+
+    def _acquire_slot(self):
+        """Reserve the next ring slot that is not the latest frame, prefetched, batched or queued for HLS."""
+        # Under frame_lock so a frame published mid-scan can't be picked: get_jpeg copies the latest slot under it
+        with self.frame_lock:
+            for step in range(1, FRAME_SLOTS):
+                idx = (self._latest_idx + step) % FRAME_SLOTS
+                if self._slot_locks[idx].acquire(blocking=False):
+                    return idx
+            # Only reachable if HLS stopped releasing slots; wait for the oldest
+            idx = (self._latest_idx + 1) % FRAME_SLOTS
+        self._slot_locks[idx].acquire()
+        return idx
+
+    def _process_frame_with_model(self, frame, frame_count, results):
+        try:
             boxes = results.boxes
             bison_count = 0
-            frame_confidences = []
 
             if boxes is not None:
-                coords = boxes.xyxy.tolist()
-                cls_list = boxes.cls.tolist()
-                ids_tensor = boxes.id
-                id_list = ids_tensor.tolist() if ids_tensor is not None else [None]*len(cls_list)
-                conf_list = boxes.conf.tolist()
-
-                for (x1, y1, x2, y2), tid, cls, conf in zip(coords, id_list, cls_list, conf_list):
-                    cls = int(cls)
-                    if cls >= len(CLASS_NAMES) or CLASS_NAMES[cls] != "bison":
-                        continue
-                    bison_count += 1
-                    frame_confidences.append(conf)
-                    x1, y1, x2, y2 = map(int, (x1, y1, x2, y2))
-
-                    color_intensity = int(255 * max(0.0, min(1.0, float(conf))))
-                    box_color = (0, color_intensity, 255 - color_intensity)
+                # One device->host copy of bison-only rows: x1,y1,x2,y2,[id,]conf,cls
+                data = boxes.data.cpu().numpy()
+                # Boxes are in INFER_SIZE coordinates; scale a copy back to the frame, since
+                # `data` can alias the Results tensor that is redrawn for still scenes
+                h, w = frame.shape[:2]
+                bison_count = len(data)
+                confs = data[:, -2]
+                coords = (data[:, :4] * ((w / INFER_SIZE[0], h / INFER_SIZE[1]) * 2)).astype(np.int32).tolist()
+                id_list = data[:, 4].astype(np.int64).tolist() if data.shape[1] == 7 else [None] * bison_count
+                # Confidence -> green level for all boxes at once (red falls as green rises)
+                greens = (np.clip(confs, 0.0, 1.0).astype(np.float64) * 255).astype(np.int32).tolist()
+
+                # Drawn straight onto the frame: each call only touches the pixels
+                # of its own box, which is cheaper than compositing a full-frame layer
+                for (x1, y1, x2, y2), tid, conf, green in zip(coords, id_list, confs.tolist(), greens):
+                    box_color = (0, green, 255 - green)
                     cv2.rectangle(frame, (x1, y1), (x2, y2), box_color, 2)
 
-                    label = f"ID {int(tid)} ({conf:.3f})" if tid is not None else f"Bison ({conf:.3f})"
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(frame, (x1, y1 - label_size[1] - 10),
-                                  (x1 + label_size[0], y1), box_color, -1)
+                    if tid is not None:
+                        label = f"ID {tid} ({conf:.3f})"
+                        label_w = LABEL_ID_WIDTH + LABEL_DIGIT_WIDTH * len(str(tid))
+                    else:
+                        label = f"Bison ({conf:.3f})"
+                        label_w = LABEL_NO_ID_WIDTH
+                    cv2.rectangle(frame, (x1, y1 - LABEL_HEIGHT - 10),
+                                  (x1 + label_w, y1), box_color, -1)
                     cv2.putText(frame, label, (x1, y1 - 5),
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
             self.stats['total_detections'] += bison_count
             self.stats['max_bison_in_frame'] = max(self.stats['max_bison_in_frame'], bison_count)
-            if frame_confidences:
-                self.stats['avg_confidence'] = sum(frame_confidences) / len(frame_confidences)
+            if bison_count:
+                self.stats['avg_confidence'] = float(confs.mean())
 
             self._add_detection_overlay(frame, bison_count, frame_count)
         except Exception as e:
-            print(f"Error in model processing: {e}")
+            print(f"Error drawing detections: {e}")
             self._add_basic_overlay(frame, frame_count)
         return frame
 
@@ -396,8 +1017,41 @@ class StreamManager:
                     (w - 140, 65), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
 
     def get_current_frame(self):
+        """Return the latest frame (read-only, shared with other readers) or None."""
         with self.frame_lock:
-            return self.current_frame.copy() if self.current_frame is not None else None
+            return self.current_frame
+
+    def get_jpeg(self, after=0, timeout=1.0):
+        """
+        Wait up to `timeout` for a frame newer than version `after` and return
+        (jpeg_bytes, version). Each frame is encoded once for all viewers.
+        """
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: self.frame_version > after, timeout)
+            version = self.frame_version
+        if version <= after:
+            return None, after
+
+        with self.encode_lock:
+            cached_version, jpeg = self.jpeg_cache
+            if cached_version < version:
+                # Copy (downscaling on the way) under frame_lock: once a newer frame is
+                # published, the reader may refill this ring slot while we encode
+                with self.frame_lock:
+                    frame, version = self.current_frame, self.frame_version
+                    h, w = frame.shape[:2]
+                    size = (MJPEG_WIDTH, round(h * MJPEG_WIDTH / w)) if MJPEG_WIDTH and w > MJPEG_WIDTH else (w, h)
+                    if self._mjpeg_scratch is None or self._mjpeg_scratch.shape[:2] != size[::-1]:
+                        self._mjpeg_scratch = np.empty((size[1], size[0], 3), np.uint8)
+                    if size == (w, h):
+                        np.copyto(self._mjpeg_scratch, frame)
+                    else:
+                        cv2.resize(frame, size, dst=self._mjpeg_scratch, interpolation=cv2.INTER_AREA)
+                jpeg = encode_jpeg(self._mjpeg_scratch)
+                if jpeg is None:
+                    return None, version
+                self.jpeg_cache = (version, jpeg)
+        return jpeg, version
 
     def stop(self):
         self.running = False
@@ -413,8 +1067,35 @@ class StreamManager:
                 pass
 
 
+# ─── HTTP SERVER ──────────────────────────────────────────────────────────────
+class StreamingServer(ThreadingHTTPServer):
+    """Thread-per-connection server, so a long MJPEG response can't block HLS or stats requests."""
+    daemon_threads = True
+
+    def __init__(self, server_address, handler, max_clients: int = MAX_HTTP_CLIENTS):
+        self.client_slots = threading.BoundedSemaphore(max_clients)
+        super().__init__(server_address, handler)
+
+    def process_request(self, request, client_address):
+        if not self.client_slots.acquire(blocking=False):
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.client_slots.release()
+
+
 # ─── HTTP HANDLER ─────────────────────────────────────────────────────────────
 class StreamingHandler(BaseHTTPRequestHandler):
+    # Socket timeout, so a viewer that stops reading frees its thread and client slot
+    timeout = HTTP_SEND_TIMEOUT
+    # Rendered main page per (model on, HLS available): (html, gzipped html, etag)
+    _page_cache = {}
+
     def __init__(self, stream_manager: StreamManager, *args, **kwargs):
         self.stream_manager = stream_manager
         super().__init__(*args, **kwargs)
@@ -451,13 +1132,32 @@ class StreamingHandler(BaseHTTPRequestHandler):
             self.send_error(404)
 
     def serve_main_page(self):
-        html_content = self.generate_html_player()
-        data = html_content.encode("utf-8")
+        key = (bool(self.stream_manager.apply_model),
+               bool(self.stream_manager.hls and self.stream_manager.hls.enabled))
+        page = self._page_cache.get(key)
+        if page is None:
+            data = self.generate_html_player().encode("utf-8")
+            etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+            page = self._page_cache[key] = (data, gzip.compress(data, 9), etag)
+        data, data_gz, etag = page
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = data_gz if use_gzip else data
         self.send_response(200)
         self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(data)
+        self.wfile.write(body)
 
     def serve_mjpeg_stream(self):
         self.send_response(200)
@@ -465,26 +1165,33 @@ class StreamingHandler(BaseHTTPRequestHandler):
         self.send_header('Cache-Control', 'no-cache')
         self.end_headers()
 
+        version = 0
         try:
             while self.stream_manager.running:
-                frame = self.stream_manager.get_current_frame()
-                if frame is not None:
-                    ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, MJPEG_QUALITY])
-                    if not ok:
-                        time.sleep(0.01)
-                        continue
-                    frame_bytes = buf.tobytes()
-
-                    self.wfile.write(b'--frame\r\n')
-                    self.send_header('Content-Type', 'image/jpeg')
-                    self.send_header('Content-Length', str(len(frame_bytes)))
-                    self.end_headers()
-                    self.wfile.write(frame_bytes)
-                    self.wfile.write(b'\r\n')
-                time.sleep(1/30)
+                # Blocks until a newer frame; its JPEG is encoded once and shared by all clients
+                frame_bytes, version = self.stream_manager.get_jpeg(version)
+                if frame_bytes is not None:
+                    # Part header, JPEG and trailer go out in one gathered send, without copying the JPEG
+                    header = (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+                              % len(frame_bytes))
+                    self._send_parts([header, frame_bytes, b'\r\n'])
         except Exception as e:
             print(f"MJPEG streaming error: {e}")
 
+    def _send_parts(self, parts):
+        """sendmsg() the buffers in order, resuming after partial sends; sendall() each where sendmsg is missing"""
+        if not hasattr(self.connection, "sendmsg"):  # Windows
+            for part in parts:
+                self.connection.sendall(part)
+            return
+        parts = [memoryview(p) for p in parts]
+        while parts:
+            sent = self.connection.sendmsg(parts)
+            while parts and sent >= len(parts[0]):
+                sent -= len(parts.pop(0))
+            if parts and sent:
+                parts[0] = parts[0][sent:]
+
     def serve_stats(self):
         stats = self.stream_manager.stats.copy()
         stats_json = json.dumps(stats, indent=2).encode("utf-8")
@@ -536,17 +1243,19 @@ class StreamingHandler(BaseHTTPRequestHandler):
             return
         try:
             with open(path, 'rb') as f:
-                data = f.read()
-            self.send_response(200)
-            self.send_header('Content-Type', self._ctype(path))
-            # Small cache for segments; playlist should be no-cache
-            if path.endswith(".ts"):
-                self.send_header('Cache-Control', 'public, max-age=60')
-            else:
-                self.send_header('Cache-Control', 'no-cache')
-            self.send_header('Content-Length', str(len(data)))
-            self.end_headers()
-            self.wfile.write(data)
+                size = os.fstat(f.fileno()).st_size
+                self.send_response(200)
+                self.send_header('Content-Type', self._ctype(path))
+                # Small cache for segments; playlist should be no-cache
+                if path.endswith(".ts"):
+                    self.send_header('Cache-Control', 'public, max-age=60')
+                else:
+                    self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Content-Length', str(size))
+                self.end_headers()
+                self.wfile.flush()
+                # Kernel sendfile(2) from the page cache; socket.sendfile falls back to send()
+                self.connection.sendfile(f, 0, size)
         except Exception:
             self.send_error(500)
 
@@ -727,20 +1436,12 @@ def create_handler(stream_manager):
     return Handler
 
 
+shutdown_event = threading.Event()  # Set by the signal handler; main() waits on it
+
+
 def signal_handler(signum, frame):
     print("\nShutting down...")
-    global server, stream_manager
-    try:
-        if 'stream_manager' in globals() and stream_manager:
-            stream_manager.stop()
-    except Exception:
-        pass
-    try:
-        if 'server' in globals() and server:
-            server.shutdown()
-    except Exception:
-        pass
-    sys.exit(0)
+    shutdown_event.set()
 
 
 def get_user_input():
@@ -771,15 +1472,24 @@ def get_user_input():
 def main():
     global server, stream_manager
 
-    signal.signal(signal.SIGINT, signal_handler)
+    cv2.setNumThreads(OPENCV_THREADS)
+    cv2.ocl.setUseOpenCL(OPENCL_RESIZE)
+    if YOLO_AVAILABLE and MODEL_CORES:
+        torch.set_num_threads(len(MODEL_CORES))
 
     print("RTSP Bison Tracker Streaming Server")
     print("=" * 60)
 
     rtsp_url, apply_model = get_user_input()
 
+    # Installed after the prompts so Ctrl+C still interrupts input() there
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
     print("\nInitializing stream manager...")
     stream_manager = StreamManager(rtsp_url, apply_model)
+    # Release ffmpeg and the capture even if we exit some other way
+    atexit.register(stream_manager.stop)
 
     try:
         width, height, fps, hls_ok = stream_manager.start_stream()
@@ -790,7 +1500,7 @@ def main():
             print("⚠️  HLS disabled (ffmpeg not found or failed to start)")
 
         handler = create_handler(stream_manager)
-        server = HTTPServer(('localhost', HTTP_PORT), handler)
+        server = StreamingServer(('localhost', HTTP_PORT), handler)
 
         print(f"\nStarting web server on port {HTTP_PORT}")
         server_thread = threading.Thread(target=server.serve_forever, daemon=True)
@@ -812,9 +1522,10 @@ def main():
         print("Press Ctrl+C to stop.")
         print("=" * 60)
 
-        # Keep alive
-        while True:
-            time.sleep(1)
+        # Sleep until a signal asks us to stop; timed waits, since an untimed one can't be
+        # interrupted by Ctrl+C on Windows
+        while not shutdown_event.wait(1.0):
+            pass
 
     except Exception as e:
         print(f"❌ Error: {e}")
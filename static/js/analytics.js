@@ -257,8 +257,11 @@ function initializeSocketHandlers() {
         updateCharts(data);
     });
     
-    socket.on('frame_processed', function(data) {
-        updateCameraStats(data);
+    socket.on('frame_stats', function(data) {
+        // One combined update for all cameras: {camera_id: {detections, fps, timestamp}}
+        Object.entries(data).forEach(([cameraId, status]) => {
+            updateCameraStats({ camera_id: cameraId, ...status });
+        });
     });
     
     socket.on('detection_event', function(data) {
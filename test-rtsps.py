@@ -1,9 +1,19 @@
+import argparse
 import cv2
 
-cap = cv2.VideoCapture("rtsps://cr-14.hostedcloudvideo.com:443/publish-cr/_definst_/G0W2EP7IKAXYETM1ANDVQ6DBRXNXCN7VK3MM7SP9/6b55ae911a8dbd2bd7d3a75ae4547acc976d0b9e?action=PLAY")
+from rtsp_bison_tracker_2 import open_capture, read_sampled
+
+parser = argparse.ArgumentParser(description="Preview an RTSP(S) stream")
+parser.add_argument("--vid-stride", type=int, default=1,
+                    help="show every Nth frame; skipped frames are grabbed but not converted")
+args = parser.parse_args()
+
+# Decodes on the GPU (GStreamer or ffmpeg NVDEC) when available, else OpenCV's FFmpeg backend
+cap = open_capture("rtsps://cr-14.hostedcloudvideo.com:443/publish-cr/_definst_/G0W2EP7IKAXYETM1ANDVQ6DBRXNXCN7VK3MM7SP9/6b55ae911a8dbd2bd7d3a75ae4547acc976d0b9e?action=PLAY")
+
 
 while cap.isOpened():
-    ret, frame = cap.read()
+    ret, frame = read_sampled(cap, max(args.vid_stride, 1))
     if not ret:
         break
     cv2.imshow("RTSP Stream", frame)
@@ -5,14 +5,21 @@ Tests all major components including detection, tracking, analytics, and API end
 """
 
 import unittest
-import json
 import time
+import queue
+import cv2
 import numpy as np
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 import sys
 import os
 
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -74,13 +81,17 @@ class TestBisonDetection(unittest.TestCase):
     def test_confidence_filtering(self):
         """Test filtering detections by confidence threshold"""
         threshold = 0.5
-        filtered = [d for d in self.mock_detections if d['confidence'] >= threshold]
-        self.assertEqual(len(filtered), 2)
+        # Detections as parallel arrays, filtered with one mask like the dashboard does
+        boxes = np.array([d['bbox'] for d in self.mock_detections], dtype=np.float32)
+        conf = np.array([d['confidence'] for d in self.mock_detections], dtype=np.float32)
+        keep = conf >= threshold
+        self.assertEqual(int(keep.sum()), 2)
         
         threshold = 0.9
-        filtered = [d for d in self.mock_detections if d['confidence'] >= threshold]
-        self.assertEqual(len(filtered), 1)
-        self.assertEqual(filtered[0]['confidence'], 0.92)
+        keep = conf >= threshold
+        self.assertEqual(len(boxes[keep]), 1)
+        self.assertAlmostEqual(float(conf[keep][0]), 0.92, places=5)
+        np.testing.assert_array_equal(boxes[keep][0], [100, 200, 150, 180])
 
 
 class TestBisonTracking(unittest.TestCase):
@@ -147,22 +158,36 @@ class TestBisonTracking(unittest.TestCase):
         iou2 = self.calculate_iou(track['bbox'], detection2['bbox'])
         self.assertLess(iou2, 0.1)  # Low overlap
     
-    def calculate_iou(self, box1, box2):
-        """Calculate Intersection over Union"""
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[0] + box1[2], box2[0] + box2[2])
-        y2 = min(box1[1] + box1[3], box2[1] + box2[3])
+    @unittest.skipUnless(SCIPY_AVAILABLE, "scipy not installed")
+    def test_track_association(self):
+        """Test assigning detections to tracks from the IoU matrix"""
+        tracks = [[100, 200, 150, 180], [400, 300, 120, 160]]
+        detections = [[402, 305, 118, 158], [500, 50, 80, 80], [104, 198, 150, 182]]
         
-        if x2 < x1 or y2 < y1:
-            return 0.0
+        iou = self.iou_matrix(tracks, detections)
+        self.assertEqual(iou.shape, (2, 3))
         
-        intersection = (x2 - x1) * (y2 - y1)
-        area1 = box1[2] * box1[3]
-        area2 = box2[2] * box2[3]
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0
+        # Each track takes its best-overlapping detection
+        rows, cols = linear_sum_assignment(-iou)
+        matches = {r: c for r, c in zip(rows, cols) if iou[r, c] > 0.3}
+        self.assertEqual(matches, {0: 2, 1: 0})
+    
+    def calculate_iou(self, box1, box2):
+        """Calculate Intersection over Union"""
+        return float(self.iou_matrix([box1], [box2])[0, 0])
+    
+    @staticmethod
+    def iou_matrix(boxes1, boxes2):
+        """IoU of every pair of [x, y, w, h] boxes as an (N, M) matrix"""
+        a = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+        b = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+        a_min, a_max = a[:, None, :2], a[:, None, :2] + a[:, None, 2:]
+        b_min, b_max = b[None, :, :2], b[None, :, :2] + b[None, :, 2:]
+        
+        overlap = np.clip(np.minimum(a_max, b_max) - np.maximum(a_min, b_min), 0, None)
+        intersection = overlap[..., 0] * overlap[..., 1]
+        union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+        return np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
 
 
 class TestBisonAnalytics(unittest.TestCase):
@@ -217,17 +242,14 @@ class TestBisonAnalytics(unittest.TestCase):
     
     def test_movement_pattern_detection(self):
         """Test detection of movement patterns"""
-        # Circular pattern
-        circular_path = []
-        for angle in range(0, 360, 30):
-            x = 500 + 100 * np.cos(np.radians(angle))
-            y = 500 + 100 * np.sin(np.radians(angle))
-            circular_path.append({'x': x, 'y': y})
+        # Circular pattern, as an (N, 2) array
+        angles = np.deg2rad(np.arange(0, 360, 30))
+        circular_path = np.stack([500 + 100 * np.cos(angles), 500 + 100 * np.sin(angles)], axis=1)
         
         pattern = self.analytics.detect_movement_pattern(circular_path)
         self.assertEqual(pattern['type'], 'circular')
         
-        # Linear pattern
+        # Linear pattern, as {'x', 'y'} dicts
         linear_path = [{'x': i * 10, 'y': i * 10} for i in range(10)]
         pattern = self.analytics.detect_movement_pattern(linear_path)
         self.assertEqual(pattern['type'], 'linear')
@@ -250,6 +272,61 @@ class TestBisonAnalytics(unittest.TestCase):
         alert = self.analytics.check_for_alerts(speed=1.0, count=5)
         self.assertIsNone(alert)
     
+    def test_heatmap_aggregation(self):
+        """Test block aggregation of the high-resolution heatmap"""
+        heatmap = self.analytics.zone_heatmap['camera_1']
+        heatmap[0, 0] = 2
+        heatmap[4, 4] = 1
+        heatmap[99, 99] = 3
+
+        data = self.analytics.get_heatmap_data('camera_1')
+        self.assertEqual(data['max'], 3)
+        self.assertEqual(data['data'], [
+            {'x': 0, 'y': 0, 'value': 3},
+            {'x': 760, 'y': 427, 'value': 3}
+        ])
+
+        # Unknown cameras have no data
+        self.assertEqual(self.analytics.get_heatmap_data('camera_9'), {'max': 0, 'data': []})
+
+    def test_array_detections(self):
+        """Test that array (SoA) detections match the list-of-dicts format"""
+        arrays = {
+            'boxes': np.array([[100, 200, 150, 280], [500, 400, 660, 590]], dtype=np.float32),
+            'ids': np.array([1, 0], dtype=np.int32),
+            'cls': np.zeros(2, dtype=np.int8),
+            'conf': np.array([0.92, 0.87], dtype=np.float32)
+        }
+        dicts = [
+            {'track_id': 1, 'confidence': 0.92, 'bbox': [100, 200, 150, 280]},
+            {'track_id': None, 'confidence': 0.87, 'bbox': [500, 400, 660, 590]}
+        ]
+        self.assertEqual(self.analytics.process_frame_detections('camera_1', arrays, 1)['count'], 2)
+        self.analytics.process_frame_detections('camera_2', dicts, 1)
+
+        # Only the tracked detection reaches the heatmap
+        np.testing.assert_array_equal(self.analytics.zone_heatmap['camera_1'],
+                                      self.analytics.zone_heatmap['camera_2'])
+        self.assertEqual(int(self.analytics.zone_heatmap['camera_1'].sum()), 1)
+        self.assertEqual(self.analytics.current_counts['camera_1'], 2)
+
+    def test_export_rows(self):
+        """Test that exports stream the header, then row chunks within the date range"""
+        detections = [{'track_id': 1, 'confidence': 0.92, 'bbox': [100, 200, 150, 280]}]
+        for frame_number in range(3):
+            self.analytics.process_frame_detections('camera_1', detections, frame_number)
+
+        today = datetime.utcnow().date().isoformat()  # SQLite stores UTC timestamps
+        chunks = self.analytics.export_rows('detections', today, today)
+        self.assertEqual(next(chunks)[:2], ('timestamp', 'camera_id'))
+        rows = [row for chunk in chunks for row in chunk]
+        self.assertEqual([row[-1] for row in rows], [0, 1, 2])
+
+        chunks = self.analytics.export_rows('detections', '2000-01-01', '2000-01-31')
+        self.assertEqual(list(chunks)[1:], [])
+        with self.assertRaises(ValueError):
+            self.analytics.export_rows('frames')
+
     def test_statistics_calculation(self):
         """Test statistical metrics calculation"""
         # Add test data
@@ -282,7 +359,7 @@ class TestFlaskAPI(unittest.TestCase):
         response = self.app.get('/api/detections')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('timestamp', data)
         self.assertIn('cameras', data)
         self.assertIn('total_count', data)
@@ -292,7 +369,7 @@ class TestFlaskAPI(unittest.TestCase):
         response = self.app.get('/api/analytics/behavior')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('behaviors', data)
         self.assertIn('dominant_behavior', data)
     
@@ -301,7 +378,7 @@ class TestFlaskAPI(unittest.TestCase):
         response = self.app.get('/api/analytics/movement')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('average_speed', data)
         self.assertIn('movement_patterns', data)
     
@@ -310,7 +387,7 @@ class TestFlaskAPI(unittest.TestCase):
         response = self.app.get('/api/cameras')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('cameras', data)
         self.assertIsInstance(data['cameras'], list)
     
@@ -319,7 +396,7 @@ class TestFlaskAPI(unittest.TestCase):
         response = self.app.get('/api/alerts')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('alerts', data)
         self.assertIsInstance(data['alerts'], list)
     
@@ -377,14 +454,14 @@ class TestPerformance(unittest.TestCase):
     def test_frame_processing_speed(self):
         """Test frame processing performance"""
         frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        small = np.empty((384, 640, 3), dtype=np.uint8)
         
-        start_time = time.time()
-        # Simulate frame processing
+        # Time the real per-frame preprocessing: downscaling to the inference size
+        start_ns = time.perf_counter_ns()
         for _ in range(10):
-            # Mock processing
-            time.sleep(0.01)  # Simulate 10ms processing time
+            cv2.resize(frame, (640, 384), dst=small, interpolation=cv2.INTER_AREA)
         
-        elapsed = time.time() - start_time
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
         fps = 10 / elapsed
         
         # Should achieve at least 10 FPS
@@ -396,14 +473,14 @@ class TestPerformance(unittest.TestCase):
                      'y': np.random.randint(0, 1080)} 
                     for _ in range(20)]
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         # Simulate analytics calculations
         for _ in range(100):
             # Mock calculations
             avg_x = sum(p['x'] for p in positions) / len(positions)
             avg_y = sum(p['y'] for p in positions) / len(positions)
         
-        elapsed = time.time() - start_time
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
         
         # Should complete in less than 1 second
         self.assertLess(elapsed, 1.0)
@@ -449,6 +526,37 @@ class TestIntegration(unittest.TestCase):
         
         self.assertEqual(len(detections), 1)
         self.assertAlmostEqual(detections[0]['confidence'], 0.92, places=2)
+    
+    def test_stream_loop_flushes_partial_batch(self):
+        """Test that a partial model batch is sent as soon as the read queue runs dry"""
+        from rtsp_bison_tracker_2 import StreamManager, MODEL_BATCH
+        
+        events = []
+        
+        class RecordingQueue(queue.Queue):
+            def get(self, block=True, timeout=None):
+                if self.empty():
+                    events.append('wait')
+                return super().get(block, timeout)
+        
+        manager = StreamManager('rtsp://test', apply_model=False)
+        manager.apply_model = True
+        manager.model = MagicMock()
+        manager.read_q = RecordingQueue()
+        
+        def track(source, **kwargs):
+            events.append(('track', len(source)))
+            manager.running = False
+            return [None] * len(source)  # No detections: frames get the basic overlay
+        manager.model.track.side_effect = track
+        
+        # One frame queued, fewer than MODEL_BATCH: it must go out without waiting for a second
+        self.assertGreater(MODEL_BATCH, 1)
+        manager.read_q.put((0, np.zeros((384, 640, 3), dtype=np.uint8)))
+        manager.running = True
+        manager._stream_loop()
+        
+        self.assertEqual(events, [('track', 1)])
 
 
 class TestErrorHandling(unittest.TestCase):